@@ -0,0 +1,115 @@
+"""Load test of the real handlers against the offline Discord stand-in.
+
+Thousands of simulated users click Join/Leave across many guilds while
+admins run /next, with REST latency and injected 429s. Each interaction goes
+through the bot's on_interaction listener first, as in discord.py, so
+unanswered ones get auto-deferred. Reports handler throughput, ack latency
+percentiles, REST calls per queue operation and how panel renders went out
+(PANEL_EDIT_VIA_INTERACTION=0 to compare with message edits only).
+
+Run from the goaty-queue directory:
+    python benchmarks/bench_load.py
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from fake_discord import FakeDiscord
+
+GUILDS = 50
+USERS_PER_GUILD = 200
+OPERATIONS = 20_000
+CONCURRENCY = 500    # handlers in flight at once
+LATENCY = 0.040      # seconds per REST call, plus up to JITTER
+JITTER = 0.040
+RATE_LIMIT_RATE = 0.01
+ADMIN_ID = 1
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def settle(goaty):
+    """Wait until every pending panel edit and ping has gone out"""
+    while goaty.render_scheduler._workers or goaty.guild_actors._senders or len(goaty.outbound):
+        await asyncio.sleep(0.05)
+
+
+async def main():
+    tmp = tempfile.TemporaryDirectory()
+    os.environ.setdefault("DISCORD_TOKEN", "benchmark")
+    os.environ["QUEUE_DB_PATH"] = os.path.join(tmp.name, "queues.db")
+    import bot as goaty
+
+    sim = FakeDiscord(latency=LATENCY, jitter=JITTER, rate_limit_rate=RATE_LIMIT_RATE)
+    sim.install(goaty)
+    guilds = [sim.add_guild(guild_id, members=range(1, USERS_PER_GUILD + 1)) for guild_id in range(1, GUILDS + 1)]
+
+    for guild in guilds:
+        await goaty.setup_queue.callback(sim.interaction(guild, ADMIN_ID, command="goaty"))
+        await goaty.start_queue_cmd.callback(sim.interaction(guild, ADMIN_ID, command="start_queue"))
+    await settle(goaty)
+    setup_calls = sim.calls.copy()
+    sim.ack_latencies.clear()
+
+    view = goaty.QueueView()
+    rng = random.Random(1)
+    limit = asyncio.Semaphore(CONCURRENCY)
+    counts = {"join": 0, "leave": 0, "next": 0}
+
+    def click(guild, user_id, custom_id):
+        # Buttons are clicked on the guild's panel message
+        return sim.interaction(guild, user_id, custom_id=custom_id, message=goaty.get_panel_message(guild))
+
+    async def handle(handler, interaction):
+        await goaty.on_interaction(interaction)
+        await handler(interaction)
+
+    async def operation():
+        guild = rng.choice(guilds)
+        user_id = rng.randint(1, USERS_PER_GUILD)
+        roll = rng.random()
+        async with limit:
+            if roll < 0.6:
+                counts["join"] += 1
+                await handle(view.join_button.callback, click(guild, user_id, "queue_join"))
+            elif roll < 0.9:
+                counts["leave"] += 1
+                await handle(view.leave_button.callback, click(guild, user_id, "queue_leave"))
+            else:
+                counts["next"] += 1
+                await handle(goaty.next_in_queue.callback, sim.interaction(guild, ADMIN_ID, command="next"))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(operation() for _ in range(OPERATIONS)))
+    handled = time.perf_counter() - started
+    await settle(goaty)
+    drained = time.perf_counter() - started
+    goaty.store.close()
+
+    calls = sim.calls - setup_calls
+    queued = sum(len(goaty.queues[guild.id].queue) for guild in guilds)
+    print(f"{GUILDS} guilds x {USERS_PER_GUILD} users, {OPERATIONS:,} operations {counts}, "
+          f"REST latency {LATENCY * 1000:.0f}+{JITTER * 1000:.0f} ms, 429 rate {RATE_LIMIT_RATE:.0%}")
+    print(f"handlers done in {handled:.2f}s ({OPERATIONS / handled:,.0f} ops/s), "
+          f"all edits and pings out after {drained:.2f}s; {queued:,} still queued")
+    acks = sim.ack_latencies
+    print("ack latency ms: " + ", ".join(f"p{pct} {percentile(acks, pct) * 1000:.0f}" for pct in (50, 90, 99, 100))
+          + f"; auto-deferred {sum(goaty.auto_deferred_total.values.values())}")
+    print(f"REST calls per operation: {sum(calls.values()) / OPERATIONS:.2f} "
+          f"(injected 429s: {sum(sim.rate_limited.values())})")
+    print("panel renders: " + ", ".join(f"{result[0]} {count:,}" for result, count in sorted(goaty.panel_edits_total.values.items())))
+    for route, count in sorted(calls.items()):
+        print(f"  {route:28} {count:8,}  {count / OPERATIONS:.3f}/op")
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
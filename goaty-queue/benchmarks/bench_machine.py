@@ -0,0 +1,104 @@
+"""Raw speed of the queue transition engine, with no Discord, timers or storage.
+
+A guild's state is driven through a random mix of joins, leaves, /next and
+/move; effects are produced but not executed. The run is repeated with a
+fifth of the joins in one of three priority tiers and aging turned on, then
+position lookups are timed on the resulting queue. Last, tier-0 joins land
+one after another at the same tier boundary in front of a large queue,
+against the plain list.insert the bot used to do.
+
+Run from the goaty-queue directory:
+    python benchmarks/bench_machine.py
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from utils import queue_machine
+from utils.guild_state import GuildQueueState
+
+TRANSITIONS = 1_000_000
+USERS = 2_000
+CHANNEL_ID = 1
+
+
+def make_commands(count, rng, tiers=0):
+    commands = []
+    for _ in range(count):
+        roll = rng.random()
+        user_id = rng.randint(1, USERS)
+        if roll < 0.5:
+            tier = rng.randrange(tiers) if tiers and rng.random() < 0.2 else None
+            commands.append(("join", CHANNEL_ID, user_id, tier))
+        elif roll < 0.85:
+            commands.append(("leave", CHANNEL_ID, user_id))
+        elif roll < 0.95:
+            commands.append(("next", CHANNEL_ID))
+        else:
+            commands.append(("move", CHANNEL_ID, user_id, rng.randint(1, 50)))
+    return commands
+
+
+def run(label, tiers, aging):
+    rng = random.Random(1)
+    commands = make_commands(TRANSITIONS, rng, tiers)
+    queue_machine.AGING_TURNS = aging
+    state = GuildQueueState(message_id=1, channel_id=CHANNEL_ID, is_active=True)
+    for user_id in range(1, USERS // 2):
+        state.queue.join_queue(user_id)
+    now = datetime.now()
+    transition = queue_machine.transition
+
+    effects = 0
+    started = time.perf_counter()
+    for command in commands:
+        effects += len(transition(state, command, now)[1])
+    elapsed = time.perf_counter() - started
+
+    print(f"{label}: {TRANSITIONS:,} transitions in {elapsed:.2f}s: {TRANSITIONS / elapsed:,.0f}/s, "
+          f"{effects / TRANSITIONS:.2f} effects each, {len(state.queue):,} queued at the end")
+
+    queue = state.queue
+    queued = queue.get_queue()
+    started = time.perf_counter()
+    for user_id in queued * 100:
+        queue.position(user_id)
+    elapsed = time.perf_counter() - started
+    print(f"{label}: position lookups {elapsed / (len(queued) * 100) * 1e6:.2f} us each, "
+          f"{len(queue.tiers()):,} queued with a tier")
+
+
+def tiered_joins(queued, joins=2_000):
+    """Priority joins into a long queue: every one goes in at the end of the tier-0 block"""
+    queue_machine.AGING_TURNS = 0
+    state = GuildQueueState(message_id=1, channel_id=CHANNEL_ID, is_active=True)
+    for user_id in range(1, queued + 1):
+        state.queue.join_queue(user_id)
+    now = datetime.now()
+    started = time.perf_counter()
+    for user_id in range(queued + 1, queued + joins + 1):
+        queue_machine.join(state, CHANNEL_ID, user_id, 0, now)
+    elapsed = time.perf_counter() - started
+
+    plain = list(range(1, queued + 1))
+    list_started = time.perf_counter()
+    for i, user_id in enumerate(range(queued + 1, queued + joins + 1)):
+        plain.insert(i, user_id)
+    list_elapsed = time.perf_counter() - list_started
+    print(f"tier-0 joins into {queued:,} queued: {elapsed / joins * 1e6:.1f} us each "
+          f"(list.insert {list_elapsed / joins * 1e6:.1f} us)")
+
+
+def main():
+    run("no tiers", 0, 0)
+    run("3 tiers, aging 3", 3, 3)
+    for queued in (10_000, 100_000):
+        tiered_joins(queued)
+
+
+if __name__ == "__main__":
+    main()
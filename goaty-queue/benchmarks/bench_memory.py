@@ -0,0 +1,86 @@
+"""Memory held per guild and per queued user: GuildQueueState vs the old dict-of-dicts layout.
+
+The old layout is rebuilt from the same user IDs: a dict per guild with the
+bot's eight keys, and a QueueManager without slots whose slot array and
+Fenwick tree were Python lists sharing the index's int objects. User IDs
+are random snowflake-sized ints, fresh objects as they come off the
+gateway. Sizes are measured with tracemalloc.
+
+Run from the goaty-queue directory:
+    python benchmarks/bench_memory.py
+"""
+import gc
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from utils.guild_state import GuildQueueState
+
+GUILDS = 20_000
+QUEUE_SIZES = (10, 100, 1_000)
+USERS_MEASURED = 200_000  # guilds per size = USERS_MEASURED / size
+
+
+class ListBackedQueue:
+    """The containers the list-backed QueueManager held (no slots, 32-slot minimum)"""
+
+    def __init__(self, user_ids):
+        # Compacted layout: a free slot after every entry, starting a quarter of the way in
+        capacity = max(32, 4 * (len(user_ids) + 1))
+        head = capacity // 4
+        self.version = len(user_ids)
+        self._tiers = {}
+        self._tier_counts = {}
+        self._index = {user_id: head + 2 * i for i, user_id in enumerate(user_ids)}
+        self._slots = [None] * capacity
+        self._tree = [0] * (capacity + 1)
+        self._counted = bytearray(capacity)
+        for user_id, slot in self._index.items():
+            self._slots[slot] = user_id
+            self._counted[slot] = 1
+            self._tree[slot + 1] = 1
+        self._head = head
+        self._tail = head + 2 * len(user_ids)
+        self._popped = 0
+
+
+def slotted_guild(user_ids):
+    state = GuildQueueState()
+    for user_id in user_ids:
+        state.queue.join_queue(user_id)
+    return state
+
+
+def dict_guild(user_ids):
+    return {"queue": ListBackedQueue(user_ids), "message_id": None, "panel_message": None, "channel_id": None,
+            "timer_handle": None, "timer_start": None, "is_active": False, "refresh_handle": None}
+
+
+def bytes_per_guild(build, guilds, size, rng):
+    """Average bytes still allocated per guild after building them"""
+    id_lists = [[rng.randrange(10**17, 2**62) for _ in range(size)] for _ in range(guilds)]
+    # The ID objects themselves belong to whoever holds the lists; only count what the queues add
+    gc.collect()
+    tracemalloc.start()
+    built = [build(user_ids) for user_ids in id_lists]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del built
+    return current / guilds
+
+
+def main():
+    for label, build in (("dict of dicts", dict_guild), ("GuildQueueState", slotted_guild)):
+        empty = bytes_per_guild(build, GUILDS, 0, random.Random(1))
+        print(f"{label}: {empty:,.0f} bytes per guild with an empty queue")
+        for size in QUEUE_SIZES:
+            guilds = USERS_MEASURED // size
+            full = bytes_per_guild(build, guilds, size, random.Random(1))
+            print(f"{label}:   {full:10,.0f} bytes per guild, {(full - empty) / size:6.1f} per queued user, with {size:,} queued")
+
+
+if __name__ == "__main__":
+    main()
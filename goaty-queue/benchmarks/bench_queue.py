@@ -0,0 +1,99 @@
+"""Microbenchmarks: QueueManager vs the plain list the bot used to keep.
+
+Run from the goaty-queue directory:
+    python benchmarks/bench_queue.py
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from utils.queue_manager import QueueManager
+
+SIZES = (10_000, 100_000, 1_000_000)
+OPS = 1_000
+
+
+def build_list(n):
+    return list(range(1, n + 1))
+
+
+def build_manager(n):
+    queue = QueueManager()
+    for user_id in range(1, n + 1):
+        queue.join_queue(user_id)
+    return queue
+
+
+def bench(label, n, stmt):
+    seconds = timeit.timeit(stmt, number=1)
+    print(f"  {label:<28} {seconds / OPS * 1e6:10.2f} us/op")
+
+
+def run(n):
+    rng = random.Random(n)
+    targets = [rng.randint(1, n) for _ in range(OPS)]
+    positions = [rng.randint(1, n) for _ in range(OPS)]
+    print(f"\n== {n:,} queued users ({OPS:,} ops each) ==")
+
+    for name, build in (("list", build_list), ("QueueManager", build_manager)):
+        print(name)
+        queue = build(n)
+        bench("membership", n, lambda: [t in queue for t in targets])
+
+        if name == "list":
+            bench("position", n, lambda: [queue.index(t) + 1 for t in targets])
+        else:
+            bench("position", n, lambda: [queue.position(t) for t in targets])
+
+        queue = build(n)
+        if name == "list":
+            def move():
+                for t, p in zip(targets, positions):
+                    queue.remove(t)
+                    queue.insert(p - 1, t)
+        else:
+            def move():
+                for t, p in zip(targets, positions):
+                    queue.move_user(t, p)
+        bench("move", n, move)
+
+        # The same spot over and over, like priority joins landing at a tier boundary
+        queue = build(n)
+        if name == "list":
+            def move_to_second():
+                for t in targets:
+                    queue.remove(t)
+                    queue.insert(1, t)
+        else:
+            def move_to_second():
+                for t in targets:
+                    queue.move_user(t, 2)
+        bench("move to position 2", n, move_to_second)
+
+        queue = build(n)
+        if name == "list":
+            def leave_join():
+                for t in targets:
+                    if t in queue:
+                        queue.remove(t)
+                    queue.append(t)
+        else:
+            def leave_join():
+                for t in targets:
+                    queue.leave_queue(t)
+                    queue.join_queue(t)
+        bench("leave + rejoin", n, leave_join)
+
+        queue = build(n)
+        if name == "list":
+            bench("pop head", n, lambda: [queue.pop(0) for _ in range(OPS)])
+        else:
+            bench("pop head", n, lambda: [queue.remove_next() for _ in range(OPS)])
+
+
+if __name__ == "__main__":
+    for size in SIZES:
+        run(size)
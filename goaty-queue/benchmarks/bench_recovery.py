@@ -0,0 +1,60 @@
+"""Startup recovery time: rebuilding 1k guilds from the SQLite store.
+
+Each guild gets a compacted snapshot plus a tail of un-compacted log events,
+which is what the store looks like after a crash between compactions.
+
+Run from the goaty-queue directory:
+    python benchmarks/bench_recovery.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from utils.storage import QueueStore
+
+GUILDS = 1_000
+QUEUED_PER_GUILD = 50
+TAIL_EVENTS_PER_GUILD = 20
+
+
+def populate(path):
+    state = {}
+    store = QueueStore(path, snapshot_every=10**9)
+    store.snapshot_source = state.get
+    for guild_id in range(1, GUILDS + 1):
+        users = list(range(1, QUEUED_PER_GUILD + 1))
+        state[guild_id] = {"queue": users, "message_id": guild_id, "channel_id": guild_id,
+                           "is_active": True, "timer_start": time.time()}
+        for user_id in users:
+            store.record(guild_id, "join", user_id)
+    store.flush()
+    store.compact()
+    for guild_id in range(1, GUILDS + 1):
+        for i in range(TAIL_EVENTS_PER_GUILD // 2):
+            store.record(guild_id, "next")
+            store.record(guild_id, "join", 1000 + i)
+    store.close()
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "queues.db")
+        started = time.perf_counter()
+        populate(path)
+        print(f"populated {GUILDS:,} guilds in {time.perf_counter() - started:.2f}s")
+
+        started = time.perf_counter()
+        store = QueueStore(path)
+        states = store.load()
+        elapsed = time.perf_counter() - started
+        store.close()
+        queued = sum(len(state.queue) for state in states.values())
+        print(f"recovered {len(states):,} guilds / {queued:,} queued users in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+"""Join/Leave spam against one guild, with and without the button throttle.
+
+A handful of users click Join and Leave as fast as they can while others
+join once, on the virtual clock from replay_trace.py. Clicks go through
+QueueView.interaction_check the way discord.py dispatches them. Reports
+clicks let through, "slow down" replies and the panel edits that got sent.
+
+Run from the goaty-queue directory:
+    python benchmarks/bench_spam.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from fake_discord import FakeDiscord
+from replay_trace import VirtualClockLoop, virtual_datetime
+from utils.throttle import Throttle
+
+SPAMMERS = 10
+CLICK_INTERVAL = 0.2  # seconds between one spammer's clicks
+REGULARS = 50
+DURATION = 60.0
+ADMIN_ID = 1
+
+
+async def run(goaty, sim, guild_id, throttle):
+    goaty.button_throttle = throttle
+    guild = sim.add_guild(guild_id, members=range(1, SPAMMERS + REGULARS + 2))
+    await goaty.setup_queue.callback(sim.interaction(guild, ADMIN_ID, command="goaty"))
+    await asyncio.sleep(1)
+    view = goaty.QueueView()
+    before = sim.calls.copy()
+    outcome = {"handled": 0, "slowed": 0}
+
+    async def click(user_id, button):
+        interaction = sim.interaction(guild, user_id, custom_id=button.custom_id)
+        if await view.interaction_check(interaction):
+            outcome["handled"] += 1
+            await button.callback(interaction)
+        else:
+            outcome["slowed"] += 1
+
+    async def spammer(user_id):
+        buttons = (view.join_button, view.leave_button)
+        for i in range(int(DURATION / CLICK_INTERVAL)):
+            await click(user_id, buttons[i % 2])
+            await asyncio.sleep(CLICK_INTERVAL)
+
+    async def regular(user_id):
+        await asyncio.sleep(DURATION * (user_id % REGULARS) / REGULARS)
+        await click(user_id, view.join_button)
+
+    first = ADMIN_ID + 1
+    await asyncio.gather(
+        *(spammer(user_id) for user_id in range(first, first + SPAMMERS)),
+        *(regular(user_id) for user_id in range(first + SPAMMERS, first + SPAMMERS + REGULARS)),
+    )
+    await asyncio.sleep(5)
+    calls = sim.calls - before
+    return outcome, calls, len(goaty.queues[guild_id].queue)
+
+
+async def main(goaty):
+    sim = FakeDiscord(latency=0.05)
+    sim.install(goaty)
+    throttled = goaty.button_throttle
+    for label, guild_id, throttle in (("no throttle", 1, Throttle(None, None)), ("throttled", 2, throttled)):
+        outcome, calls, queued = await run(goaty, sim, guild_id, throttle)
+        print(f"{label:12} clicks handled {outcome['handled']:5,}, slowed down {outcome['slowed']:5,}, "
+              f"panel edits {calls['message.edit']:4,} ({calls['message.edit'] / DURATION:.1f}/s), "
+              f"{queued} queued at the end")
+    print("throttled by bucket: " + str(dict(goaty.throttled_total.values)))
+
+
+if __name__ == "__main__":
+    tmp = tempfile.TemporaryDirectory()
+    os.environ.setdefault("DISCORD_TOKEN", "benchmark")
+    os.environ["QUEUE_DB_PATH"] = os.path.join(tmp.name, "queues.db")
+    import bot as goaty
+
+    loop = VirtualClockLoop(1_700_000_000.0)
+    goaty.datetime = virtual_datetime(loop)
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_until_complete(main(goaty))
+        goaty.store.close()
+        pending = asyncio.all_tasks(loop)
+        for task in pending:
+            task.cancel()
+        loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+    finally:
+        loop.close()
+        tmp.cleanup()
@@ -0,0 +1,269 @@
+"""Offline stand-in for the parts of Discord the bot talks to.
+
+Interactions (with ``response.send_message`` / ``edit_message`` /
+``send_modal`` / ``defer``), guilds, members, channels and messages, all
+backed by a ``FakeDiscord`` that adds configurable REST latency and injects
+429s. Every REST call is counted per route, and the time from an
+interaction's creation to its ack is recorded, so benchmarks can report
+ack latency and REST calls per queue operation without a live Discord.
+
+Handlers are driven directly, e.g.::
+
+    sim = FakeDiscord(latency=0.05, rate_limit_rate=0.01)
+    sim.install(bot_module)
+    guild = sim.add_guild(1, members=range(1, 1001))
+    await view.join_button.callback(sim.interaction(guild, user_id=5, custom_id="queue_join"))
+"""
+import asyncio
+import itertools
+import random
+from collections import Counter
+from types import SimpleNamespace
+
+import discord
+
+
+def rate_limit_error(retry_after):
+    """The HTTPException discord.py raises for a 429 it gave up retrying"""
+    response = SimpleNamespace(status=429, reason="Too Many Requests", headers={"Retry-After": str(retry_after)})
+    return discord.HTTPException(response, "You are being rate limited.")
+
+
+def not_found_error():
+    response = SimpleNamespace(status=404, reason="Not Found", headers={})
+    return discord.NotFound(response, "Unknown Message")
+
+
+class FakeDiscord:
+    """Fake REST surface plus the guild and channel cache lookups the bot uses.
+
+    ``latency`` (+ up to ``jitter``) seconds is slept on every REST call.
+    A call fails with a 429 with probability ``rate_limit_rate``, asking the
+    caller to retry after ``retry_after`` seconds.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, rate_limit_rate=0.0, retry_after=0.05, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.guilds = {}
+        self.channels = {}
+        self.calls = Counter()         # route -> successful REST calls
+        self.rate_limited = Counter()  # route -> injected 429s
+        self.ack_latencies = []        # seconds from interaction creation to ack
+        self._ids = itertools.count(10**17)
+
+    def next_id(self):
+        return next(self._ids)
+
+    async def rest(self, route, can_rate_limit=True):
+        """Simulate one REST round trip on ``route``"""
+        delay = self.latency + (self.random.random() * self.jitter if self.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        if can_rate_limit and self.rate_limit_rate and self.random.random() < self.rate_limit_rate:
+            self.rate_limited[route] += 1
+            raise rate_limit_error(self.retry_after)
+        self.calls[route] += 1
+
+    @property
+    def rest_calls(self):
+        return sum(self.calls.values())
+
+    # --- Cache lookups, mirroring discord.Client ---
+
+    def add_guild(self, guild_id, members=()):
+        guild = FakeGuild(self, guild_id, members)
+        self.guilds[guild_id] = guild
+        return guild
+
+    def get_guild(self, guild_id):
+        return self.guilds.get(guild_id)
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    def install(self, bot_module):
+        """Point the bot's cache lookups at this fake"""
+        bot_module.bot.get_guild = self.get_guild
+        bot_module.bot.get_channel = self.get_channel
+
+    def interaction(self, guild, user_id, custom_id=None, command=None, channel=None, message=None, permissions=None):
+        """``message`` is the message whose button was clicked, for component interactions.
+        ``permissions`` (a discord.Permissions) defaults to all of them."""
+        return FakeInteraction(self, guild, channel or guild.channel, guild.get_member(user_id) or FakeUser(user_id),
+                               custom_id, command, message, permissions)
+
+
+class FakeUser:
+    def __init__(self, user_id, name=None):
+        self.id = user_id
+        self.name = name or f"user{user_id}"
+        self.display_name = self.name
+        self.mention = f"<@{user_id}>"
+
+
+class FakeMember(FakeUser):
+    def __init__(self, guild, user_id, name=None):
+        super().__init__(user_id, name)
+        self.guild = guild
+
+
+class FakeGuild:
+    def __init__(self, sim, guild_id, members=()):
+        self.sim = sim
+        self.id = guild_id
+        self.members = {user_id: FakeMember(self, user_id) for user_id in members}
+        self.channels = {}
+        self.channel = self.add_channel(sim.next_id())
+
+    def add_channel(self, channel_id):
+        channel = FakeChannel(self.sim, self, channel_id)
+        self.channels[channel_id] = channel
+        self.sim.channels[channel_id] = channel
+        return channel
+
+    def get_member(self, user_id):
+        return self.members.get(user_id)
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+
+class FakeChannel:
+    def __init__(self, sim, guild, channel_id):
+        self.sim = sim
+        self.guild = guild
+        self.id = channel_id
+        self.messages = {}
+        self.sent = []  # plain-text messages, e.g. turn pings
+
+    async def send(self, content=None, *, embed=None, view=None, **kwargs):
+        await self.sim.rest("channel.send")
+        message = FakeMessage(self, self.sim.next_id(), content, embed)
+        self.messages[message.id] = message
+        if content is not None:
+            self.sent.append(content)
+        return message
+
+    def get_partial_message(self, message_id):
+        # Like discord.PartialMessage: no REST call, and it may point at a deleted message
+        return self.messages.get(message_id) or FakeMessage(self, message_id, deleted=True)
+
+    async def fetch_message(self, message_id):
+        await self.sim.rest("channel.fetch_message")
+        message = self.messages.get(message_id)
+        if message is None:
+            raise not_found_error()
+        return message
+
+
+class FakeMessage:
+    def __init__(self, channel, message_id, content=None, embed=None, deleted=False):
+        self.channel = channel
+        self.id = message_id
+        self.content = content
+        self.embed = embed
+        self.deleted = deleted
+        self.edits = 0
+
+    async def edit(self, *, content=None, embed=None, **kwargs):
+        await self.channel.sim.rest("message.edit")
+        if self.deleted:
+            raise not_found_error()
+        if content is not None:
+            self.content = content
+        if embed is not None:
+            self.embed = embed
+        self.edits += 1
+        return self
+
+    async def delete(self):
+        await self.channel.sim.rest("message.delete")
+        self.deleted = True
+        self.channel.messages.pop(self.id, None)
+
+
+class FakeResponse:
+    """interaction.response: one ack per interaction, timed from its creation"""
+
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self._done = False
+        self.content = None
+        self.ephemeral = False
+
+    def is_done(self):
+        return self._done
+
+    async def _ack(self, route):
+        if self._done:
+            raise discord.InteractionResponded(self.interaction)
+        sim = self.interaction.sim
+        # Interaction callbacks aren't subject to the bot's rate limits
+        await sim.rest(route, can_rate_limit=False)
+        self._done = True
+        sim.ack_latencies.append(asyncio.get_running_loop().time() - self.interaction.created_loop_time)
+
+    async def send_message(self, content=None, *, ephemeral=False, **kwargs):
+        await self._ack("interaction.send_message")
+        self.content = content
+        self.ephemeral = ephemeral
+
+    async def edit_message(self, *, content=None, embed=None, **kwargs):
+        await self._ack("interaction.edit_message")
+        self.content = content
+        if embed is not None and self.interaction.message:
+            self.interaction.message.embed = embed
+
+    async def send_modal(self, modal):
+        await self._ack("interaction.send_modal")
+
+    async def defer(self, *, ephemeral=False, thinking=False):
+        await self._ack("interaction.defer")
+        self.ephemeral = ephemeral
+
+
+class FakeFollowup:
+    """interaction.followup: messages sent after the interaction was answered or deferred"""
+
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def send(self, content=None, *, ephemeral=False, **kwargs):
+        await self.interaction.sim.rest("interaction.followup", can_rate_limit=False)
+
+
+class FakeInteraction:
+    ids = itertools.count(1)
+
+    def __init__(self, sim, guild, channel, user, custom_id=None, command=None, message=None, permissions=None):
+        self.id = next(self.ids)
+        self.sim = sim
+        self.guild = guild
+        self.guild_id = guild.id
+        self.channel = channel
+        self.channel_id = channel.id
+        self.user = user
+        self.message = message
+        self.permissions = permissions if permissions is not None else discord.Permissions.all()
+        self.created_at = discord.utils.utcnow()
+        self.created_loop_time = asyncio.get_running_loop().time()
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+        if custom_id is not None:
+            self.type = discord.InteractionType.component
+            self.data = {"custom_id": custom_id}
+        else:
+            self.type = discord.InteractionType.application_command
+            self.data = {"name": command}
+        # The resolved app command; benchmarks call callbacks directly, so there is none
+        self.command = None
+
+    async def edit_original_response(self, *, content=None, embed=None, **kwargs):
+        await self.sim.rest("interaction.edit_original_response", can_rate_limit=False)
+        self.response.content = content
+        if embed is not None and self.message:
+            self.message.embed = embed
@@ -0,0 +1,283 @@
+"""Replay a recorded trace (TRACE_PATH) against the bot on a virtual clock.
+
+The event loop's clock only moves when everything is idle, and then jumps
+straight to the next timer, so a day of traffic replays in seconds and the
+same trace always produces the same run. Handlers, actors, timers and the
+panel renderer are the bot's own; Discord is the offline stand-in from
+fake_discord.py. Button clicks go through the view's check and slash
+commands through theirs, with the permissions recorded for them (traces
+from before those were recorded count as allowed), so the throttles and
+permission checks turn away what production turned away.
+Turn expiries seen during the replay are compared with the ones recorded
+in production.
+
+Run from the goaty-queue directory:
+    python benchmarks/replay_trace.py TRACE [--latency SECONDS] [--check] [--save PATH]
+
+``--save`` writes the trace back with this run's expiries in place of the
+recorded ones, so a replay on one build becomes the baseline that
+``--check`` holds another build to.
+"""
+import argparse
+import asyncio
+import json
+import os
+import selectors
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+import discord
+from discord import app_commands
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from fake_discord import FakeDiscord, FakeMessage, FakeUser
+from utils.storage import state_from_snapshot
+from utils.trace import read_trace
+
+# Expiries more than this many seconds apart count as different turns
+EXPIRY_TOLERANCE = 1.0
+
+
+class VirtualSelector(selectors.SelectSelector):
+    """Polls real file descriptors without blocking, then advances the virtual clock instead of sleeping"""
+
+    def __init__(self):
+        super().__init__()
+        self.now = 0.0
+
+    def select(self, timeout=None):
+        ready = super().select(0)
+        if not ready and timeout:
+            self.now += timeout
+        return ready
+
+
+class VirtualClockLoop(asyncio.SelectorEventLoop):
+    def __init__(self, start):
+        selector = VirtualSelector()
+        selector.now = start
+        super().__init__(selector)
+        # The clock holds epoch seconds, whose float spacing (~2e-7) is coarser than the
+        # monotonic clock's resolution; without this a timer due "now" is never run
+        self._clock_resolution = 1e-6
+
+    def time(self):
+        return self._selector.now
+
+
+def virtual_datetime(loop):
+    class VirtualDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.fromtimestamp(loop.time(), tz)
+    return VirtualDatetime
+
+
+class MemoryTrace:
+    """Stands in for the bot's TraceRecorder to capture what the replay does"""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.events = []
+
+    def record(self, kind, *fields):
+        self.events.append([self.loop.time(), kind, *fields])
+
+    def close(self):
+        pass
+
+
+class Replay:
+    def __init__(self, goaty, sim):
+        self.goaty = goaty
+        self.sim = sim
+        self.view = goaty.QueueView()
+        self.buttons = {"queue_join": self.view.join_button, "queue_leave": self.view.leave_button}
+        self.handled = Counter()
+        self.rejected = Counter()
+        self.skipped = Counter()
+
+    def guild(self, guild_id, channel_id):
+        guild = self.sim.get_guild(guild_id) or self.sim.add_guild(guild_id)
+        if channel_id and not guild.get_channel(channel_id):
+            guild.add_channel(channel_id)
+        return guild
+
+    def restore(self, snapshots):
+        states = {}
+        for guild_id, saved in snapshots.items():
+            guild = self.guild(guild_id, saved["channel_id"])
+            if saved["channel_id"] and saved["message_id"]:
+                channel = guild.get_channel(saved["channel_id"])
+                channel.messages[saved["message_id"]] = FakeMessage(channel, saved["message_id"])
+            states[guild_id] = state_from_snapshot(saved)
+        self.goaty.restore_queues(states)
+        self.goaty.resync_panels()
+
+    async def dispatch(self, event):
+        _, kind, guild_id, channel_id, user_id, name, *rest = event
+        guild = self.guild(guild_id, channel_id)
+        channel = guild.get_channel(channel_id) or guild.channel
+        # Everyone who interacts is a member, so the panel doesn't flag them as gone
+        guild.members.setdefault(user_id, FakeUser(user_id))
+
+        if kind == "component":
+            button = self.buttons.get(name)
+            if button is None:
+                self.skipped[name.split(":", 1)[0]] += 1
+                return
+            # Buttons are clicked on the panel
+            panel = self.goaty.get_panel_message(guild)
+            interaction = self.sim.interaction(guild, user_id, custom_id=name, channel=channel, message=panel)
+            # The view's check is where the button throttle turns clicks away
+            if not await self.view.interaction_check(interaction):
+                self.rejected[name] += 1
+                return
+            await button.callback(interaction)
+        else:
+            command = self.goaty.bot.tree.get_command(name)
+            if command is None:
+                self.skipped[name] += 1
+                return
+            options = rest[0] if rest else {}
+            permissions = discord.Permissions(rest[1]) if len(rest) > 1 else None
+            kwargs = {}
+            for param in command.parameters:
+                if param.name not in options:
+                    continue
+                value = options[param.name]
+                if param.type == discord.AppCommandOptionType.user:
+                    value = guild.get_member(int(value)) or FakeUser(int(value))
+                kwargs[param.name] = value
+            interaction = self.sim.interaction(guild, user_id, command=name, channel=channel, permissions=permissions)
+            try:
+                allowed = await command._check_can_run(interaction)
+            except app_commands.CheckFailure as error:
+                await self.goaty.on_app_command_error(interaction, error)
+                allowed = False
+            if not allowed:
+                self.rejected[name] += 1
+                return
+            await command.callback(interaction, **kwargs)
+        self.handled[name] += 1
+
+
+def compare_expiries(recorded, replayed):
+    """Match expiries per guild by time; returns (matched, max drift, recorded only, replayed only)"""
+    by_guild = defaultdict(lambda: ([], []))
+    for event in recorded:
+        by_guild[event[2]][0].append(event[0])
+    for event in replayed:
+        by_guild[event[2]][1].append(event[0])
+    matched = missing = extra = 0
+    drift = 0.0
+    for expected, actual in by_guild.values():
+        actual = sorted(actual)
+        for when in sorted(expected):
+            close = [t for t in actual if abs(t - when) <= EXPIRY_TOLERANCE]
+            if close:
+                best = min(close, key=lambda t: abs(t - when))
+                actual.remove(best)
+                drift = max(drift, abs(best - when))
+                matched += 1
+            else:
+                missing += 1
+        extra += len(actual)
+    return matched, drift, missing, extra
+
+
+async def replay(goaty, events, latency):
+    loop = asyncio.get_running_loop()
+    sim = FakeDiscord(latency=latency)
+    sim.install(goaty)
+    runner = Replay(goaty, sim)
+    capture = MemoryTrace(loop)
+    goaty.tracer = capture
+
+    snapshots = {event[2]: event[3] for event in events if event[1] == "state"}
+    runner.restore(snapshots)
+
+    tasks = set()
+    recorded_expiries = []
+    for event in events:
+        if event[1] == "state":
+            continue
+        if event[1] == "expire":
+            recorded_expiries.append(event)
+            continue
+        delay = event[0] - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.create_task(runner.dispatch(event))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    # Let in-flight handlers, edits and pings finish, and any expiry due right at the end fire
+    await asyncio.sleep(EXPIRY_TOLERANCE)
+    replayed_expiries = [event for event in capture.events if event[1] == "expire"]
+    return runner, sim, recorded_expiries, replayed_expiries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("trace")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated REST latency in seconds")
+    parser.add_argument("--check", action="store_true", help="exit with status 1 if turn expiries diverge")
+    parser.add_argument("--save", metavar="PATH", help="write the trace with this run's expiries, as a baseline for --check")
+    args = parser.parse_args()
+
+    events = sorted(read_trace(args.trace), key=lambda event: event[0])
+    if not events:
+        raise SystemExit("Trace is empty")
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ.setdefault("DISCORD_TOKEN", "replay")
+    os.environ["QUEUE_DB_PATH"] = os.path.join(tmp.name, "queues.db")
+    os.environ.pop("TRACE_PATH", None)
+    import bot as goaty
+
+    loop = VirtualClockLoop(events[0][0])
+    goaty.datetime = virtual_datetime(loop)
+    asyncio.set_event_loop(loop)
+    started = time.perf_counter()
+    try:
+        runner, sim, recorded, replayed = loop.run_until_complete(replay(goaty, events, args.latency))
+        goaty.store.close()
+        pending = asyncio.all_tasks(loop)
+        for task in pending:
+            task.cancel()
+        loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+    finally:
+        loop.close()
+        tmp.cleanup()
+    wall = time.perf_counter() - started
+
+    span = events[-1][0] - events[0][0]
+    print(f"replayed {sum(runner.handled.values()):,} interactions spanning {span:,.0f}s "
+          f"in {wall:.2f}s ({span / wall:,.0f}x real time)")
+    print("handled: " + ", ".join(f"{name} {count:,}" for name, count in runner.handled.most_common()))
+    if runner.rejected:
+        print("rejected by checks: " + ", ".join(f"{name} {count:,}" for name, count in runner.rejected.most_common()))
+    if runner.skipped:
+        print("skipped: " + ", ".join(f"{name} {count:,}" for name, count in runner.skipped.most_common()))
+    print(f"REST calls: {sim.rest_calls:,} " + str(dict(sorted(sim.calls.items()))))
+
+    matched, drift, missing, extra = compare_expiries(recorded, replayed)
+    print(f"turn expiries: recorded {len(recorded):,}, replayed {len(replayed):,}, matched {matched:,} "
+          f"(max drift {drift * 1000:.0f} ms), recorded only {missing:,}, replay only {extra:,}")
+    if args.save:
+        baseline = [event for event in events if event[1] != "expire"]
+        baseline += [[round(event[0], 3), *event[1:]] for event in replayed]
+        baseline.sort(key=lambda event: event[0])
+        with open(args.save, "w") as f:
+            f.writelines(json.dumps(event, separators=(",", ":")) + "\n" for event in baseline)
+    if args.check and (missing or extra):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
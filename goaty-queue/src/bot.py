@@ -2,12 +2,37 @@ import os
 import discord
 from discord.ext import commands
 from discord import app_commands
-from typing import Optional
+from typing import Literal, Optional
 import asyncio
-from datetime import datetime, timedelta
+import aiohttp
+import io
+import json
+import math
+import time
+import signal
+from datetime import datetime
+try:
+    import resource
+except ImportError:
+    # Unix only; startup just leaves out the peak RSS figure
+    resource = None
 from dotenv import load_dotenv
-from threading import Thread
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from utils.guild_state import GuildQueueState
+from utils.render_scheduler import RenderScheduler
+from utils.timer_scheduler import TimerScheduler
+from utils.storage import QueueStore
+from utils.guild_actor import GuildActors
+from utils.dispatcher import OutboundDispatcher, ACK, PING, EDIT
+from utils.name_cache import NameCache
+from utils.panel_renderer import PanelRenderer
+from utils.queue_pages import QueuePages
+from utils.health_server import HealthServer, LoopLagProbe
+from utils.metrics import MetricsRegistry
+from utils.command_sync import sync_if_changed
+from utils.trace import TraceRecorder
+from utils.throttle import Throttle, parse_limit
+from utils import queue_machine
+from utils.queue_io import MAX_IMPORT_SIZE, export_queue, parse_import, parse_user_ids
 
 
 # Load environment variables
@@ -18,327 +43,733 @@ BOT_TOKEN = os.getenv("DISCORD_TOKEN")
 if not BOT_TOKEN:
     raise SystemExit("ERROR: Set DISCORD_TOKEN environment variable")
 
+STARTED_AT = time.monotonic()
+
+# LAZY_MEMBERS=1 turns off the members intent and member chunking. Mentions are
+# rendered straight from user IDs, and names come from a cache filled by interactions.
+LAZY_MEMBERS = os.getenv("LAZY_MEMBERS", "0").lower() in ("1", "true", "yes")
 
 intents = discord.Intents.default()
-intents.message_content = True
-intents.members = True
+if not LAZY_MEMBERS:
+    intents.message_content = True
+    intents.members = True
+
+bot_options = {}
+if LAZY_MEMBERS:
+    bot_options = {"chunk_guilds_at_startup": False, "member_cache_flags": discord.MemberCacheFlags.none()}
+
+# Prometheus metrics, served on /metrics next to the health checks
+metrics = MetricsRegistry()
+interactions_total = metrics.counter("goaty_interactions_total", "Interactions received, by slash command, button or modal", ("type", "name"))
+ack_latency = metrics.histogram(
+    "goaty_interaction_ack_seconds", "Time from an interaction being created to its first response being sent, by command or button",
+    labelnames=("type", "name"),
+)
+throttled_total = metrics.counter("goaty_throttled_total", "Button clicks and admin commands turned away by the rate limits, by bucket", ("type", "name", "scope"))
+auto_deferred_total = metrics.counter("goaty_interactions_auto_deferred_total", "Interactions deferred because their handler hadn't answered in time", ("type", "name"))
+panel_render_duration = metrics.histogram(
+    "goaty_panel_render_seconds", "Time spent building a panel embed in update_queue_message",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+panel_edits_total = metrics.counter("goaty_panel_edits_total", "Panel renders, by whether an edit was sent, superseded by a newer one before it went out, carried in an interaction response or skipped as unchanged", ("result",))
+rest_requests_total = metrics.counter("goaty_rest_requests_total", "Discord REST responses, by route", ("method", "route"))
+rest_ratelimited_total = metrics.counter("goaty_rest_ratelimited_total", "Discord REST responses with status 429, by route", ("method", "route"))
+turn_expiry_lateness = metrics.histogram(
+    "goaty_turn_expiry_lateness_seconds", "Time a turn was actually expired minus its deadline",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0),
+)
+metrics.gauge("goaty_queue_length", "People in each guild's queue", lambda: {(guild_id,): len(data.queue) for guild_id, data in queues.items()}, ("guild_id",))
+metrics.gauge("goaty_active_timers", "Timers waiting in the timer scheduler", lambda: {(): len(timers)})
+metrics.gauge("goaty_timer_lag_seconds", "How late the most recent timer fired", lambda: {(): timers.last_lag})
+metrics.gauge("goaty_timer_lag_max_seconds", "Latest any timer has fired since startup", lambda: {(): timers.max_lag})
+metrics.counter("goaty_timers_fired_total", "Timers the timer scheduler has fired", collect=lambda: {(): timers.fired})
+
+def outbound_stats(field):
+    return lambda: {(name,): stats[field] for name, stats in outbound.snapshot().items()}
+
+metrics.gauge("goaty_outbound_queue_depth", "REST calls waiting in the outbound dispatcher, by class", outbound_stats("depth"), ("class",))
+metrics.gauge("goaty_outbound_wait_avg_seconds", "Average time a REST call waited in the outbound dispatcher, by class", outbound_stats("avg_wait"), ("class",))
+metrics.gauge("goaty_outbound_wait_max_seconds", "Longest time a REST call waited in the outbound dispatcher, by class", outbound_stats("max_wait"), ("class",))
+metrics.gauge(
+    "goaty_outbound_jobs", "REST calls the outbound dispatcher sent, dropped as superseded or retried after a 429, by class",
+    lambda: {(name, outcome): stats[outcome] for name, stats in outbound.snapshot().items() for outcome in ("sent", "dropped", "retried")},
+    ("class", "outcome"),
+)
+
+def rest_route(path: str) -> str:
+    """Route template of a REST path, e.g. /channels/:id/messages/:id, so IDs and tokens don't become labels"""
+    parts = path.split("/")[3:]  # drop the leading "", "api" and "v10"
+    for i, part in enumerate(parts):
+        if part.isdigit():
+            parts[i] = ":id"
+        elif i >= 2 and parts[i - 2] in ("interactions", "webhooks"):
+            parts[i] = ":token"
+    return "/" + "/".join(parts)
+
+async def on_rest_response(session, context, params):
+    labels = (params.method, rest_route(params.url.path))
+    rest_requests_total.inc(labels)
+    if params.response.status == 429:
+        rest_ratelimited_total.inc(labels)
+
+# Every REST response discord.py gets, including the 429s it retries internally
+rest_trace = aiohttp.TraceConfig()
+rest_trace.on_request_end.append(on_rest_response)
+bot_options["http_trace"] = rest_trace
 
-bot = commands.Bot(command_prefix="/", intents=intents)
+# Sharded mode: start.py runs several bot processes, each given a range of SHARD_IDS out of SHARD_COUNT
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", 0))
 
-# Queue storage: {guild_id: {"queue": [user_ids], "message_id": int, "channel_id": int, "timer_task": Task, "timer_start": datetime, "is_active": bool, "update_task": Task}}
+if SHARD_COUNT:
+    shard_ids = [int(shard_id) for shard_id in os.getenv("SHARD_IDS", "").split(",") if shard_id] or None
+    bot = commands.AutoShardedBot(command_prefix="/", intents=intents, shard_count=SHARD_COUNT, shard_ids=shard_ids, **bot_options)
+else:
+    bot = commands.Bot(command_prefix="/", intents=intents, **bot_options)
+
+# Display names of recent users, for messages that show a name rather than a mention
+names = NameCache()
+
+def display_name(guild: discord.Guild, user_id: int) -> Optional[str]:
+    member = guild.get_member(user_id)
+    if member:
+        return member.name
+    return names.get(user_id)
+
+def owns_guild(guild_id: int) -> bool:
+    """A guild's queue is owned by the process whose shards receive that guild's events"""
+    if not SHARD_COUNT or bot.shard_ids is None:
+        return True
+    return (guild_id >> 22) % SHARD_COUNT in bot.shard_ids
+
+# Queue storage: {guild_id: GuildQueueState}
 queues = {}
 
 # Timer duration in seconds (6 minutes = 360 seconds)
 TIMER_DURATION = 360
 
-async def update_timer_display(guild_id: int):
-    """Background task that updates the queue display every 5 seconds to show countdown"""
+# Role IDs that get priority in the queue, best first ("111,222"). Members with one of these
+# roles join after everyone of the same or a better tier instead of at the back.
+PRIORITY_ROLES = [int(role_id) for role_id in os.getenv("PRIORITY_ROLES", "").split(",") if role_id.strip()]
+
+# After this many turns in a row go to a better tier, the longest-waiting lower-tier member goes next (0 = never)
+queue_machine.AGING_TURNS = int(os.getenv("PRIORITY_AGING_TURNS", 0))
+
+def priority_tier(member) -> Optional[int]:
+    """Index in PRIORITY_ROLES of the member's best priority role, or None"""
+    if not PRIORITY_ROLES:
+        return None
+    role_ids = {role.id for role in getattr(member, "roles", ())}
+    return next((tier for tier, role_id in enumerate(PRIORITY_ROLES) if role_id in role_ids), None)
+
+# Minimum seconds between two edits of the same queue panel
+PANEL_MIN_EDIT_INTERVAL = float(os.getenv("PANEL_MIN_EDIT_INTERVAL", 1.0))
+
+# Answer Join/Leave clicks on the panel by editing it in the interaction response, with the
+# confirmation as an ephemeral followup, whenever that stands in for the panel's next edit
+PANEL_EDIT_VIA_INTERACTION = os.getenv("PANEL_EDIT_VIA_INTERACTION", "1") != "0"
+
+# "timestamp" lets Discord count down client-side, so the panel is only edited when the queue changes.
+# "polling" re-renders the countdown every REFRESH_INTERVAL seconds instead.
+PANEL_RENDER_MODE = os.getenv("PANEL_RENDER_MODE", "timestamp")
+
+# Builds panel embeds from cached rows and remembers what each panel currently shows
+panel_renderer = PanelRenderer(TIMER_DURATION, timestamps=PANEL_RENDER_MODE == "timestamp")
+
+# Every queue mutation is logged here so queues and running turns survive restarts.
+# In sharded mode all processes share this file and each one only loads the guilds it owns.
+store = QueueStore(os.getenv("QUEUE_DB_PATH", "queues.db"))
+
+# All sends and edits go through here: interaction acks first, then turn pings, then panel edits,
+# with each channel in its own lane so one channel's rate limit doesn't hold up the others
+outbound = OutboundDispatcher()
+
+# Discord fails an interaction that isn't answered within 3 seconds. One still unanswered after
+# ACK_DEFER_AFTER seconds is deferred so the handler can follow up later; acks slower than
+# ACK_WARN_AFTER seconds are logged with the command that was slow.
+ACK_DEFER_AFTER = float(os.getenv("ACK_DEFER_AFTER", 2.0))
+ACK_WARN_AFTER = float(os.getenv("ACK_WARN_AFTER", 1.5))
+
+# Interaction ID -> its response in flight, so a handler's answer waits for an automatic defer instead of racing it
+responding = {}
+
+def interaction_label(interaction: discord.Interaction) -> tuple:
+    """(type, name) metric labels: the slash command, or the custom_id prefix of a button or modal"""
+    data = interaction.data or {}
+    if interaction.type == discord.InteractionType.application_command:
+        return "command", data.get("name")
+    # Page buttons carry their target in the ID; keep only the prefix as the label
+    return interaction.type.name, data.get("custom_id", "").split(":", 1)[0]
+
+async def acknowledge(interaction: discord.Interaction, call):
+    """Send an interaction response through the dispatcher (highest priority) and time the first ack.
+
+    call runs once any earlier response to the same interaction has landed, so
+    it can check interaction.response.is_done() and follow up instead.
+    """
+    earlier = responding.get(interaction.id)
+    if earlier:
+        await asyncio.wait([earlier])
+    first = not interaction.response.is_done()
+    future = outbound.submit(ACK, call)
+    responding[interaction.id] = future
     try:
-        while True:
-            await asyncio.sleep(5)  # Update every 5 seconds
-            
-            # Check if queue still exists and has people
-            if guild_id not in queues or not queues[guild_id]["queue"]:
-                continue
-            
-            # Get guild
-            guild = bot.get_guild(guild_id)
-            if not guild:
-                break
-            
-            # Update the queue message to show current timer
-            await update_queue_message(guild)
-    except asyncio.CancelledError:
-        pass
+        result = await future
+    finally:
+        if responding.get(interaction.id) is future:
+            del responding[interaction.id]
+    if first:
+        elapsed = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+        label = interaction_label(interaction)
+        ack_latency.observe(elapsed, label)
+        if elapsed > ACK_WARN_AFTER:
+            print(f"Slow ack: {label[1]} ({label[0]}) took {elapsed:.2f}s in guild {interaction.guild_id}")
+    return result
+
+def respond(interaction: discord.Interaction, *args, **kwargs):
+    """Answer an interaction with a message, or follow up if it was already answered or deferred"""
+    def send():
+        if interaction.response.is_done():
+            return interaction.followup.send(*args, **kwargs)
+        return interaction.response.send_message(*args, **kwargs)
+    return acknowledge(interaction, send)
+
+def edit_response(interaction: discord.Interaction, **kwargs):
+    """Edit the message a button or modal belongs to, even if the interaction was deferred"""
+    def send():
+        if interaction.response.is_done():
+            return interaction.edit_original_response(**kwargs)
+        return interaction.response.edit_message(**kwargs)
+    return acknowledge(interaction, send)
+
+# Fire-and-forget tasks; the loop only keeps weak references, so hold them until they finish
+background_tasks = set()
 
-async def start_timer(guild_id: int):
-    """Start the 6-minute timer for the first person in queue"""
+def spawn(coro):
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+async def defer_if_unanswered(interaction: discord.Interaction):
+    if interaction.response.is_done() or interaction.id in responding:
+        return
+    auto_deferred_total.inc(interaction_label(interaction))
+    if interaction.type == discord.InteractionType.application_command:
+        # The deferral decides whether the answer is ephemeral; commands tagged public answer everyone
+        command = interaction.command
+        public = bool(command and command.extras.get("public"))
+        call = lambda: interaction.response.defer(ephemeral=not public, thinking=True)
+    else:
+        call = interaction.response.defer
     try:
-        # Wait 6 minutes
-        await asyncio.sleep(TIMER_DURATION)
-        
-        # Check if queue still has people
-        if guild_id not in queues or not queues[guild_id]["queue"]:
-            return
-        
-        # Remove first person
-        removed_user_id = queues[guild_id]["queue"].pop(0)
-        
-        # Get guild and channel
+        await acknowledge(interaction, call)
+    except discord.HTTPException as e:
+        print(f"Failed to defer interaction in guild {interaction.guild_id}: {e}")
+
+def schedule_auto_defer(interaction: discord.Interaction):
+    """Defer the interaction in ACK_DEFER_AFTER seconds (minus the time it took to reach us) if nothing answered it"""
+    age = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+    asyncio.get_running_loop().call_later(max(ACK_DEFER_AFTER - age, 0), lambda: spawn(defer_if_unanswered(interaction)))
+
+# Turn-expiry deadlines and countdown refreshes for every guild share one scheduler
+timers = TimerScheduler()
+
+# Seconds between countdown refreshes of the panel while a turn is running
+REFRESH_INTERVAL = 5
+
+def arm_turn_timer(guild_id: int, started_at: datetime, elapsed: float = 0.0):
+    """Schedule the end of the turn that began at started_at, replacing any running timer.
+    
+    The deadline is kept on the event loop's monotonic clock, so wall-clock jumps don't move it.
+    elapsed is how much of the turn is already over, for a turn resumed after a restart.
+    """
+    data = queues[guild_id]
+    if data.timer_handle:
+        data.timer_handle.cancel()
+    remaining = TIMER_DURATION - elapsed
+    data.deadline = asyncio.get_running_loop().time() + remaining
+    data.ends_at = started_at.timestamp() + TIMER_DURATION
+    data.timer_handle = timers.call_at(data.deadline, expire_turn, guild_id, started_at)
+    
+    # Start countdown refreshes if not already ticking
+    if PANEL_RENDER_MODE == "polling" and not data.refresh_handle:
+        data.refresh_handle = timers.call_at(next_refresh(data.deadline), refresh_timer_display, guild_id)
+
+def cancel_turn_timer(guild_id: int):
+    """Stop the turn timer and countdown refreshes (queue empty, stopped or cleared)"""
+    data = queues[guild_id]
+    if data.timer_handle:
+        data.timer_handle.cancel()
+        data.timer_handle = None
+    if data.refresh_handle:
+        data.refresh_handle.cancel()
+        data.refresh_handle = None
+    data.deadline = data.ends_at = None
+
+def next_refresh(deadline: float) -> float:
+    """Next countdown refresh: a whole number of REFRESH_INTERVALs before the deadline, so late ticks don't drift"""
+    now = asyncio.get_running_loop().time()
+    # Strictly after now, even when a tick lands exactly on its slot
+    return deadline - (math.ceil((deadline - now) / REFRESH_INTERVAL) - 1) * REFRESH_INTERVAL
+
+def refresh_timer_display(guild_id: int):
+    """Scheduler tick that refreshes the countdown shown on the panel"""
+    data = queues.get(guild_id)
+    if not data or not data.timer_handle:
+        return
+    
+    render_scheduler.mark_dirty(guild_id)
+    data.refresh_handle = timers.call_at(next_refresh(data.deadline), refresh_timer_display, guild_id)
+
+def expire_turn(guild_id: int, timer_start: datetime):
+    """Called by the scheduler when the first person's 6 minutes are up"""
+    if tracer:
+        tracer.record("expire", guild_id, timer_start.timestamp())
+    guild_actors.submit(guild_id, "expire", None, timer_start)
+
+# --- Queue commands ---
+# Commands run inside the guild's actor. queue_machine.transition changes the state and returns
+# (result, effects) without doing any I/O; apply_queue_command then carries out the local effects
+# (log, timers) on the spot and hands the rest (panel refresh, pings) to run_queue_effects, which
+# runs after the whole batch of pending commands has been applied.
+
+def apply_queue_command(guild_id: int, command: tuple):
+    op = command[0]
+    data = queues.get(guild_id)
+    if data is None and op in ("join", "replace", "reset"):
+        data = queues[guild_id] = GuildQueueState()
+    
+    old_message = None
+    if op == "reset":
+        # Hand the old panel back so the caller can delete it
         guild = bot.get_guild(guild_id)
-        if not guild:
-            return
-        
-        channel = guild.get_channel(queues[guild_id]["channel_id"])
-        if not channel:
-            return
-        
-        # Notify that time expired (with ping)
-        removed_user = guild.get_member(removed_user_id)
-        if removed_user:
-            await channel.send(f"{removed_user.mention} Your time is up! (6 minutes expired)")
+        old_message = get_panel_message(guild) if guild else None
+        render_scheduler.cancel(guild_id)
+        panel_renderer.forget(guild_id)
+        data.panel_message = None
+    elif op == "panel":
+        # The machine only keeps IDs; the message object becomes the cached panel handle
+        message = command[2]
+        command = ("panel", command[1], message.id)
+        data.panel_message = message
+        panel_renderer.forget(guild_id)
+    
+    # How far past its deadline an expiry lands, timer and actor queue included
+    late = asyncio.get_running_loop().time() - data.deadline if op == "expire" and data and data.deadline else None
+    
+    result, effects = queue_machine.transition(data, command, datetime.now())
+    
+    if late is not None and result is not None:
+        turn_expiry_lateness.observe(max(0.0, late))
+    
+    remote = []
+    for effect in effects:
+        kind = effect[0]
+        if kind == "log":
+            store.record(guild_id, *effect[1:])
+        elif kind == "arm_timer":
+            arm_turn_timer(guild_id, effect[1])
+        elif kind == "cancel_timer":
+            cancel_turn_timer(guild_id)
         else:
-            await channel.send(f"<@{removed_user_id}> Your time is up! (6 minutes expired)")
-        
-        # Update queue display
-        await update_queue_message(guild)
+            remote.append(effect)
+    
+    return (old_message if op == "reset" else result), remote
+
+def batch_messages(guild_id: int, effects: list):
+    """Turn one batch's ping effects into as few messages as possible: [(channel_id, content)]
+    
+    Only the last turn ping in the batch is kept, and only if that person is still first,
+    so a burst of leaves never pings people whose turn is already over.
+    """
+    data = queues.get(guild_id)
+    last_turn = None
+    for effect in effects:
+        if effect[0] == "turn":
+            last_turn = effect
+    
+    messages = []
+    for effect in effects:
+        if effect[0] == "expired":
+            _, channel_id, user_id = effect
+            content = f"<@{user_id}> Your time is up! (6 minutes expired)"
+        elif effect is last_turn and data and data.queue.next_in_queue() == effect[2] and data.timer_start:
+            _, channel_id, user_id, queue_started = effect
+            content = f"{'Queue started! ' if queue_started else ''}<@{user_id}> **It's your turn now!**"
+        else:
+            continue
         
-        # Ping next person if queue not empty
-        if queues[guild_id]["queue"]:
-            next_user_id = queues[guild_id]["queue"][0]
-            next_user = guild.get_member(next_user_id)
-            
-            if next_user:
-                await channel.send(f"{next_user.mention} **It's your turn now!**")
-            else:
-                await channel.send(f"<@{next_user_id}> **It's your turn now!**")
-            
-            # Start timer for next person
-            queues[guild_id]["timer_task"] = asyncio.create_task(start_timer(guild_id))
-            queues[guild_id]["timer_start"] = datetime.now()
-            
-            # Start update task if not already running
-            if not queues[guild_id].get("update_task") or queues[guild_id]["update_task"].done():
-                queues[guild_id]["update_task"] = asyncio.create_task(update_timer_display(guild_id))
+        # Consecutive lines for the same channel go out as one message
+        if messages and messages[-1][0] == channel_id and len(messages[-1][1]) + len(content) < 1900:
+            messages[-1] = (channel_id, f"{messages[-1][1]}\n{content}")
         else:
-            # No one left in queue
-            queues[guild_id]["timer_task"] = None
-            queues[guild_id]["timer_start"] = None
-            
-            # Stop update task
-            if queues[guild_id].get("update_task"):
-                queues[guild_id]["update_task"].cancel()
-                queues[guild_id]["update_task"] = None
-    except asyncio.CancelledError:
-        # Timer was cancelled (queue cleared or person manually removed)
-        pass
+            messages.append((channel_id, content))
+    return messages
+
+async def run_queue_effects(guild_id: int, effects: list):
+    """Carry out the effects of one batch of queue commands: one panel refresh, then the pings"""
+    if queue_machine.RENDER in effects:
+        render_scheduler.mark_dirty(guild_id)
+    
+    for channel_id, content in batch_messages(guild_id, effects):
+        channel = bot.get_channel(channel_id) if channel_id else None
+        if not channel and channel_id and not bot.is_ready():
+            # A turn that ran out while the bot was down expires before the channel cache is filled
+            await bot.wait_until_ready()
+            channel = bot.get_channel(channel_id)
+        if not channel:
+            continue
+        try:
+            await outbound.submit(PING, lambda: channel.send(content), lane=channel_id)
+        except discord.HTTPException as e:
+            print(f"Failed to send queue notification in guild {guild_id}: {e}")
+
+# Every queue mutation for a guild goes through its actor, one command at a time
+guild_actors = GuildActors(apply_queue_command, run_queue_effects)
+
+# Token buckets in front of the queue buttons and admin commands, as "COUNT/SECONDS" (a burst
+# of COUNT, refilled at COUNT per SECONDS) per user and per guild. "0" turns a limit off.
+button_throttle = Throttle(parse_limit(os.getenv("BUTTON_USER_LIMIT", "4/20")), parse_limit(os.getenv("BUTTON_GUILD_LIMIT", "100/10")))
+admin_throttle = Throttle(parse_limit(os.getenv("ADMIN_USER_LIMIT", "10/10")), parse_limit(os.getenv("ADMIN_GUILD_LIMIT", "30/10")))
+
+SLOW_DOWN = "You're clicking too fast, slow down and try again in a few seconds."
+
+class Throttled(app_commands.CheckFailure):
+    def __init__(self, scope: str):
+        super().__init__(f"Throttled ({scope} limit)")
+        self.scope = scope
+
+def throttled(throttle: Throttle, interaction: discord.Interaction) -> Optional[str]:
+    """Spend a token for this interaction; returns the exhausted bucket ("user" or "guild") if it must be turned away"""
+    scope = throttle.allow(interaction.guild_id, interaction.user.id, asyncio.get_running_loop().time())
+    if scope:
+        throttled_total.inc((*interaction_label(interaction), scope))
+    return scope
+
+@app_commands.check
+async def admin_throttled(interaction: discord.Interaction) -> bool:
+    scope = throttled(admin_throttle, interaction)
+    if scope:
+        raise Throttled(scope)
+    return True
+
+async def answer_button(interaction: discord.Interaction, content: str):
+    """Confirm a click that changed the queue, carrying the panel update in the interaction response if possible.
+    
+    The panel's next edit goes out as the response (no message edit, so it stays off the channel's
+    rate limit) and the confirmation follows up ephemerally. That only happens when the click came
+    from the current panel and the render scheduler would edit it right away; otherwise a plain
+    ephemeral reply is sent and the scheduler's coalesced edit updates the panel.
+    """
+    guild_id = interaction.guild_id
+    data = queues.get(guild_id)
+    if not (PANEL_EDIT_VIA_INTERACTION and data and data.message_id and interaction.guild
+            and getattr(interaction.message, "id", None) == data.message_id
+            and not interaction.response.is_done() and render_scheduler.claim(guild_id)):
+        await respond(interaction, content, ephemeral=True)
+        return
+    
+    rendered = False
+    try:
+        embed, changed = render_embed(interaction.guild, data)
+        if changed:
+            panel_edits_total.inc(("interaction",))
+            await edit_response(interaction, embed=embed)
+            panel_renderer.posted(guild_id, embed)
+            rendered = True
+        else:
+            panel_edits_total.inc(("skipped",))
+    except discord.HTTPException as e:
+        print(f"Failed to update queue panel through interaction in guild {guild_id}: {e}")
+        # The claim dropped the pending refresh; hand it back to the scheduler
+        render_scheduler.mark_dirty(guild_id)
+    finally:
+        render_scheduler.release(guild_id, rendered)
+    
+    # Followup if the panel edit answered the interaction, a plain reply otherwise
+    await respond(interaction, content, ephemeral=True)
 
 class QueueView(discord.ui.View):
     def __init__(self):
         super().__init__(timeout=None)  # Persistent view
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        # Excess clicks get a cheap ephemeral reply and never reach the queue or the panel
+        if throttled(button_throttle, interaction):
+            await respond(interaction, SLOW_DOWN, ephemeral=True)
+            return False
+        return True
     
     @discord.ui.button(label="Join Queue", style=discord.ButtonStyle.green, custom_id="queue_join", row=0)
     async def join_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        guild_id = interaction.guild_id
-        user_id = interaction.user.id
+        tier = priority_tier(interaction.user)
+        position = await guild_actors.submit(interaction.guild_id, "join", interaction.channel_id, interaction.user.id, tier)
         
-        if guild_id not in queues:
-            queues[guild_id] = {"queue": [], "message_id": None, "channel_id": None, "timer_task": None, "timer_start": None, "is_active": False, "update_task": None}
-        
-        if user_id in queues[guild_id]["queue"]:
-            await interaction.response.send_message("You're already in the queue!", ephemeral=True)
+        if position is None:
+            await respond(interaction, "You're already in the queue!", ephemeral=True)
             return
         
-        queues[guild_id]["queue"].append(user_id)
-        position = len(queues[guild_id]["queue"])
-        
-        await interaction.response.send_message(f"Joined queue at position **{position}**", ephemeral=True)
-        await update_queue_message(interaction.guild)
-        
-        # Only start timer if queue is active and this is the first person
-        if position == 1 and queues[guild_id].get("is_active"):
-            # Cancel any existing timer first
-            if queues[guild_id].get("timer_task"):
-                queues[guild_id]["timer_task"].cancel()
-            
-            await interaction.channel.send(f"{interaction.user.mention} **It's your turn now!**")
-            queues[guild_id]["timer_task"] = asyncio.create_task(start_timer(guild_id))
-            queues[guild_id]["timer_start"] = datetime.now()
-            
-            # Start update task if not already running
-            if not queues[guild_id].get("update_task") or queues[guild_id]["update_task"].done():
-                queues[guild_id]["update_task"] = asyncio.create_task(update_timer_display(guild_id))
+        await answer_button(interaction, f"Joined queue at position **{position}**")
     
     @discord.ui.button(label="Leave Queue", style=discord.ButtonStyle.red, custom_id="queue_leave", row=0)
     async def leave_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        guild_id = interaction.guild_id
-        user_id = interaction.user.id
+        left = await guild_actors.submit(interaction.guild_id, "leave", interaction.channel_id, interaction.user.id)
         
-        if guild_id not in queues or user_id not in queues[guild_id]["queue"]:
-            await interaction.response.send_message("You're not in the queue!", ephemeral=True)
+        if not left:
+            await respond(interaction, "You're not in the queue!", ephemeral=True)
             return
         
-        # Check if this user was first in queue
-        was_first = queues[guild_id]["queue"][0] == user_id if queues[guild_id]["queue"] else False
-        
-        queues[guild_id]["queue"].remove(user_id)
-        await interaction.response.send_message("Left the queue", ephemeral=True)
-        await update_queue_message(interaction.guild)
-        
-        # If the person who left was first, ping the new first person (only if queue is active)
-        if was_first and queues[guild_id]["queue"]:
-            # Cancel existing timer
-            if queues[guild_id].get("timer_task"):
-                queues[guild_id]["timer_task"].cancel()
-            
-            # Only ping and start timer if queue is active
-            if queues[guild_id].get("is_active"):
-                next_user_id = queues[guild_id]["queue"][0]
-                next_user = interaction.guild.get_member(next_user_id)
-                
-                channel = interaction.channel
-                if next_user:
-                    await channel.send(f"{next_user.mention} **It's your turn now!**")
-                else:
-                    await channel.send(f"<@{next_user_id}> **It's your turn now!**")
-                
-                # Restart timer for next person
-                queues[guild_id]["timer_task"] = asyncio.create_task(start_timer(guild_id))
-                queues[guild_id]["timer_start"] = datetime.now()
-                
-                # Start update task if not already running
-                if not queues[guild_id].get("update_task") or queues[guild_id]["update_task"].done():
-                    queues[guild_id]["update_task"] = asyncio.create_task(update_timer_display(guild_id))
-            else:
-                queues[guild_id]["timer_task"] = None
-                queues[guild_id]["timer_start"] = None
-        elif was_first:
-            # Queue is now empty, cancel timer
-            if queues[guild_id].get("timer_task"):
-                queues[guild_id]["timer_task"].cancel()
-            queues[guild_id]["timer_task"] = None
-            queues[guild_id]["timer_start"] = None
-            
-            # Stop update task
-            if queues[guild_id].get("update_task"):
-                queues[guild_id]["update_task"].cancel()
-                queues[guild_id]["update_task"] = None
-            queues[guild_id]["timer_start"] = None
+        await answer_button(interaction, "Left the queue")
+
+def render_embed(guild: discord.Guild, data: GuildQueueState):
+    """Build a guild's panel embed; returns (embed, whether it differs from what the panel shows)"""
+    started = time.perf_counter()
+    # Without the member cache we can't tell who left, so just mention them
+    has_left = (lambda user_id: False) if LAZY_MEMBERS else (lambda user_id: guild.get_member(user_id) is None)
+    remaining = data.deadline - asyncio.get_running_loop().time() if data.deadline else None
+    embed = panel_renderer.build(guild.id, data.queue, data.is_active, data.ends_at, remaining, has_left)
+    changed = panel_renderer.changed(guild.id, embed)
+    panel_render_duration.observe(time.perf_counter() - started)
+    return embed, changed
 
 async def update_queue_message(guild: discord.Guild):
     """Update the queue embed message"""
     guild_id = guild.id
     
-    if guild_id not in queues or not queues[guild_id].get("message_id"):
+    if guild_id not in queues or not queues[guild_id].message_id:
         return
     
-    channel = guild.get_channel(queues[guild_id]["channel_id"])
-    if not channel:
+    message = get_panel_message(guild)
+    if not message:
         return
     
-    try:
-        message = await channel.fetch_message(queues[guild_id]["message_id"])
-    except:
-        return
+    data = queues[guild_id]
+    embed, changed = render_embed(guild, data)
     
-    queue_list = queues[guild_id]["queue"]
-    is_active = queues[guild_id].get("is_active", False)
+    # Nothing visible changed since the last edit
+    if not changed:
+        panel_edits_total.inc(("skipped",))
+        return
     
-    status_text = "ACTIVE" if is_active else "STOPPED"
+    try:
+        # None means a newer edit superseded this one before it was sent
+        if await outbound.submit(EDIT, lambda: message.edit(embed=embed), key=("panel", guild_id), lane=data.channel_id) is None:
+            panel_edits_total.inc(("superseded",))
+        else:
+            panel_edits_total.inc(("sent",))
+            panel_renderer.posted(guild_id, embed)
+    except discord.NotFound:
+        # Panel was deleted: drop the stale handle and post a fresh one
+        data.panel_message = None
+        panel_renderer.forget(guild_id)
+        channel = guild.get_channel(data.channel_id)
+        if channel:
+            new_message = await outbound.submit(EDIT, lambda: channel.send(embed=embed, view=QueueView()), lane=channel.id)
+            # Through the actor like /goaty, so the new IDs are logged in order with the queue's other changes
+            await guild_actors.submit(guild_id, "panel", channel.id, new_message)
+            panel_renderer.posted(guild_id, embed)
+
+def get_panel_message(guild: discord.Guild):
+    """Return the cached panel message handle, rebuilding it from the stored IDs if needed"""
+    data = queues.get(guild.id)
+    if not data or not data.message_id:
+        return None
     
-    # Calculate remaining time if timer is active
-    timer_text = f"\n**Time per person:** 6 minutes"
-    if is_active and queue_list and queues[guild_id].get("timer_start"):
-        elapsed = (datetime.now() - queues[guild_id]["timer_start"]).total_seconds()
-        remaining = max(0, TIMER_DURATION - elapsed)
-        
-        minutes = int(remaining // 60)
-        seconds = int(remaining % 60)
-        timer_text += f"\n**Time remaining:** {minutes}:{seconds:02d}"
+    if data.panel_message is None:
+        channel = guild.get_channel(data.channel_id)
+        if not channel:
+            return None
+        # A partial message needs no REST call; edits go straight to the message ID
+        data.panel_message = channel.get_partial_message(data.message_id)
     
-    embed = discord.Embed(
-        title="Queue System",
-        description=f"**Status:** {status_text}\n**Total in queue:** {len(queue_list)}{timer_text}",
-        color=discord.Color.green() if is_active else discord.Color.red()
-    )
+    return data.panel_message
+
+async def render_panel(guild_id: int):
+    """Render callback for the scheduler: refresh one guild's panel"""
+    guild = bot.get_guild(guild_id)
+    if guild:
+        await update_queue_message(guild)
+
+# Handlers only mark the panel dirty; edits happen in the background, one at a time per guild
+render_scheduler = RenderScheduler(render_panel, PANEL_MIN_EDIT_INTERVAL)
+
+def snapshot_queue(guild_id: int):
+    """Persistable view of a guild's queue, used when the store compacts its log"""
+    data = queues.get(guild_id)
+    if not data:
+        return None
+    saved = {
+        "queue": data.queue.get_queue(),
+        "message_id": data.message_id,
+        "channel_id": data.channel_id,
+        "is_active": data.is_active,
+        "timer_start": data.timer_start.timestamp() if data.timer_start else None,
+    }
+    tiers = data.queue.tiers()
+    if tiers:
+        saved["tiers"] = tiers
+    return saved
+
+store.snapshot_source = snapshot_queue
+
+def restore_queues(states: Optional[dict] = None):
+    """Rebuild queues from the store (or the given states) and resume running turns with their real remaining time.
     
-    if queue_list:
-        queue_text = ""
-        for idx, user_id in enumerate(queue_list[:10], 1):  # Show top 10
-            user = guild.get_member(user_id)
-            
-            # Calculate wait time and timer for each person
-            wait_info = ""
-            if is_active and queues[guild_id].get("timer_start"):
-                if idx == 1:
-                    # First person - show remaining time
-                    elapsed = (datetime.now() - queues[guild_id]["timer_start"]).total_seconds()
-                    remaining = max(0, TIMER_DURATION - elapsed)
-                    minutes = int(remaining // 60)
-                    seconds = int(remaining % 60)
-                    wait_info = f" `{minutes}:{seconds:02d} remaining`"
-                else:
-                    # Other people - show estimated wait time
-                    elapsed = (datetime.now() - queues[guild_id]["timer_start"]).total_seconds()
-                    current_remaining = max(0, TIMER_DURATION - elapsed)
-                    # Each person before them has their full timer duration, except the first person
-                    estimated_wait = current_remaining + ((idx - 2) * TIMER_DURATION)
-                    wait_minutes = int(estimated_wait // 60)
-                    wait_seconds = int(estimated_wait % 60)
-                    wait_info = f" `~{wait_minutes}:{wait_seconds:02d} wait`"
-            
-            if user:
-                queue_text += f"**{idx}.** {user.mention}{wait_info}\n"
-            else:
-                queue_text += f"**{idx}.** <@{user_id}> (left server){wait_info}\n"
+    Runs in setup_hook, before the gateway connects, so no interaction can have created state to overwrite.
+    Panels are re-synced by resync_panels once the bot is ready and their channels are cached.
+    """
+    started = time.perf_counter()
+    if states is None:
+        states = store.load(owns_guild)
+    for guild_id, data in states.items():
+        # The store keeps the turn start as an epoch timestamp
+        timer_start = data.timer_start
+        data.timer_start = None
+        queues[guild_id] = data
         
-        embed.add_field(name="Current Queue", value=queue_text, inline=False)
-        
-        if len(queue_list) > 10:
-            embed.add_field(name="", value=f"*...and {len(queue_list) - 10} more*", inline=False)
-    else:
-        embed.add_field(name="Current Queue", value="*Queue is empty*", inline=False)
+        if timer_start and data.is_active and data.queue:
+            # Only the time spent down comes from the wall clock; expiry fires right away if the deadline passed meanwhile
+            data.timer_start = datetime.fromtimestamp(timer_start)
+            arm_turn_timer(guild_id, data.timer_start, max(0.0, datetime.now().timestamp() - timer_start))
     
-    await message.edit(embed=embed)
+    print(f"Restored {len(queues)} queue(s) in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+def resync_panels():
+    """Refresh every panel after startup; message handles are rebuilt from the stored IDs"""
+    for guild_id in queues:
+        render_scheduler.mark_dirty(guild_id)
+
+# TRACE_PATH records every interaction and turn expiry to that file, for replay with benchmarks/replay_trace.py
+TRACE_PATH = os.getenv("TRACE_PATH")
+tracer = None
+
+def start_trace():
+    """Open the trace, starting with a snapshot of every queue so a replay begins from the same state"""
+    global tracer
+    tracer = TraceRecorder(TRACE_PATH)
+    for guild_id in queues:
+        tracer.record("state", guild_id, snapshot_queue(guild_id))
+
+# on_ready also fires after reconnects; only re-sync panels and commands once
+panels_synced = False
+commands_synced = False
+
+# Hash of the last synced command tree; the tree is only re-uploaded when it changes
+COMMAND_HASH_PATH = os.getenv("COMMAND_HASH_PATH", "command_tree.hash")
+
+# Set to a server ID to sync commands to that server only, where they show up instantly (handy for testing)
+SYNC_GUILD_ID = int(os.getenv("SYNC_GUILD_ID", 0))
+
+@bot.event
+async def setup_hook():
+    # Before the gateway connects, so every interaction finds the restored queues
+    restore_queues()
+    if TRACE_PATH:
+        start_trace()
 
 @bot.event
 async def on_ready():
+    global panels_synced, commands_synced
     print(f"Logged in as {bot.user} (ID: {bot.user.id})")
+    peak_rss = ""
+    if resource:
+        # ru_maxrss is in KB on Linux
+        peak_rss = f", peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB"
+    print(f"Ready {time.monotonic() - STARTED_AT:.1f}s after start{peak_rss} (lazy members: {LAZY_MEMBERS})")
     
     # Register persistent view
     bot.add_view(QueueView())
+    bot.add_view(QueuePageView())
+    bot.add_dynamic_items(QueuePageButton)
+    
+    if not panels_synced:
+        panels_synced = True
+        resync_panels()
     
-    # Sync slash commands (globally - takes up to 1 hour)
+    if not commands_synced:
+        commands_synced = True
+        await sync_commands()
+        print(f"Startup complete {time.monotonic() - STARTED_AT:.1f}s after start")
+
+async def sync_commands():
+    # In sharded mode one process syncs for everyone
+    if SHARD_COUNT and bot.shard_ids is not None and 0 not in bot.shard_ids:
+        return
+    
+    guild = discord.Object(id=SYNC_GUILD_ID) if SYNC_GUILD_ID else None
+    if guild:
+        bot.tree.copy_global_to(guild=guild)
+    
+    started = time.monotonic()
     try:
-        synced = await bot.tree.sync()
-        print(f"Synced {len(synced)} slash command(s) globally")
-        print("NOTE: Global commands can take up to 1 hour to appear in Discord")
-        print("For instant testing, use guild-specific sync (see comments in code)")
+        synced = await sync_if_changed(bot.tree, COMMAND_HASH_PATH, guild=guild)
     except Exception as e:
         print(f"Failed to sync commands: {e}")
+        return
+    
+    if synced is None:
+        print("Slash commands unchanged since the last sync, skipping sync")
+    elif guild:
+        print(f"Synced {synced} slash command(s) to guild {SYNC_GUILD_ID} in {time.monotonic() - started:.1f}s")
+        print("Commands should appear immediately in that server")
+    else:
+        print(f"Synced {synced} slash command(s) globally in {time.monotonic() - started:.1f}s")
+        print("NOTE: Global commands can take up to 1 hour to appear in Discord")
+        print("For instant testing, set SYNC_GUILD_ID to your server's ID")
 
-# OPTIONAL: For instant command sync during testing, uncomment this and add your guild ID
-# Replace YOUR_GUILD_ID with your server's ID (right-click server icon > Copy Server ID)
-# @bot.event
-# async def on_ready():
-#     print(f"Logged in as {bot.user} (ID: {bot.user.id})")
-#     bot.add_view(QueueView())
-#     
-#     guild = discord.Object(id=YOUR_GUILD_ID)  # Replace with your server ID
-#     bot.tree.copy_global_to(guild=guild)
-#     synced = await bot.tree.sync(guild=guild)
-#     print(f"Synced {len(synced)} command(s) to guild instantly")
-#     print("Commands should appear immediately in your server")
+@bot.event
+async def on_interaction(interaction: discord.Interaction):
+    # Every interaction carries the user's name, which keeps the name cache warm
+    names.remember(interaction.user)
+    
+    data = interaction.data or {}
+    if interaction.type == discord.InteractionType.application_command or "custom_id" in data:
+        interactions_total.inc(interaction_label(interaction))
+        schedule_auto_defer(interaction)
+    
+    if tracer:
+        if interaction.type == discord.InteractionType.application_command:
+            options = {option["name"]: option.get("value") for option in data.get("options", [])}
+            # Checks run after this, so keep what they look at for the replay to run them again
+            tracer.record("command", interaction.guild_id, interaction.channel_id, interaction.user.id, data.get("name"), options,
+                          interaction.permissions.value)
+        elif "custom_id" in data:
+            tracer.record("component", interaction.guild_id, interaction.channel_id, interaction.user.id, data["custom_id"])
+
+@bot.tree.error
+async def on_app_command_error(interaction: discord.Interaction, error: app_commands.AppCommandError):
+    # Answer failed checks and errors too, so the user never sees "interaction failed"
+    if isinstance(error, Throttled):
+        message = SLOW_DOWN
+    elif isinstance(error, app_commands.MissingPermissions):
+        message = "You need administrator permission to use this command."
+    else:
+        print(f"Error in /{interaction.command.name if interaction.command else '?'} in guild {interaction.guild_id}: {error!r}")
+        message = "Something went wrong, please try again."
+    try:
+        await respond(interaction, message, ephemeral=True)
+    except discord.HTTPException:
+        pass
 
 @bot.tree.command(name="goaty", description="[ADMIN] Create the queue panel")
+@admin_throttled
 @app_commands.checks.has_permissions(administrator=True)
 async def setup_queue(interaction: discord.Interaction):
     """Admin command to create the queue panel"""
     guild_id = interaction.guild_id
     
     # Respond to interaction first to prevent timeout
-    await interaction.response.send_message("Creating queue panel...", ephemeral=True)
+    await respond(interaction, "Creating queue panel...", ephemeral=True)
     
     # If a queue already exists, clean it up first
-    if guild_id in queues:
-        # Cancel any running timers
-        if queues[guild_id].get("timer_task"):
-            queues[guild_id]["timer_task"].cancel()
-        if queues[guild_id].get("update_task"):
-            queues[guild_id]["update_task"].cancel()
-        
-        # Try to delete the old queue message
-        if queues[guild_id].get("message_id") and queues[guild_id].get("channel_id"):
-            try:
-                channel = interaction.guild.get_channel(queues[guild_id]["channel_id"])
-                if channel:
-                    old_message = await channel.fetch_message(queues[guild_id]["message_id"])
-                    await old_message.delete()
-            except:
-                pass  # Message might already be deleted
-    
-    # Initialize or reset queue data
-    queues[guild_id] = {"queue": [], "message_id": None, "channel_id": None, "timer_task": None, "timer_start": None, "is_active": False, "update_task": None}
+    old_message = await guild_actors.submit(guild_id, "reset", interaction.channel_id)
+    
+    # Try to delete the old queue message
+    if old_message:
+        try:
+            await outbound.submit(EDIT, old_message.delete, lane=old_message.channel.id)
+        except:
+            pass  # Message might already be deleted
     
     # Create the new queue panel
     embed = discord.Embed(
@@ -349,247 +780,182 @@ async def setup_queue(interaction: discord.Interaction):
     embed.add_field(name="Current Queue", value="*Queue is empty*", inline=False)
     
     view = QueueView()
-    message = await interaction.channel.send(embed=embed, view=view)
+    message = await outbound.submit(EDIT, lambda: interaction.channel.send(embed=embed, view=view), lane=interaction.channel_id)
     
-    # Store the message info
-    queues[guild_id]["message_id"] = message.id
-    queues[guild_id]["channel_id"] = interaction.channel_id
-    queues[guild_id]["is_active"] = False  # Queue starts inactive
+    # Store the message info (queue starts inactive)
+    await guild_actors.submit(guild_id, "panel", interaction.channel_id, message)
     
     # Update the ephemeral response
-    await interaction.edit_original_response(content="Queue panel created! Use `/start_queue` to begin accepting people.")
+    await outbound.submit(ACK, lambda: interaction.edit_original_response(content="Queue panel created! Use `/start_queue` to begin accepting people."))
 
 @bot.tree.command(name="start_queue", description="[ADMIN] Start the queue and begin timers")
+@admin_throttled
 @app_commands.checks.has_permissions(administrator=True)
 async def start_queue_cmd(interaction: discord.Interaction):
     """Admin command to start the queue"""
-    guild_id = interaction.guild_id
+    result = await guild_actors.submit(interaction.guild_id, "start", interaction.channel_id)
     
-    if guild_id not in queues:
-        await interaction.response.send_message("No queue panel exists! Use `/goaty` first.", ephemeral=True)
-        return
-    
-    if queues[guild_id].get("is_active"):
-        await interaction.response.send_message("Queue is already active!", ephemeral=True)
-        return
-    
-    queues[guild_id]["is_active"] = True
-    
-    # If there's someone in queue, ping them and start their timer
-    if queues[guild_id]["queue"]:
-        first_user_id = queues[guild_id]["queue"][0]
-        first_user = interaction.guild.get_member(first_user_id)
-        
-        if first_user:
-            await interaction.channel.send(f"Queue started! {first_user.mention} **It's your turn now!**")
-        else:
-            await interaction.channel.send(f"Queue started! <@{first_user_id}> **It's your turn now!**")
-        
-        # Start timer for first person
-        queues[guild_id]["timer_task"] = asyncio.create_task(start_timer(guild_id))
-        queues[guild_id]["timer_start"] = datetime.now()
-        
-        # Start update task if not already running
-        if not queues[guild_id].get("update_task") or queues[guild_id]["update_task"].done():
-            queues[guild_id]["update_task"] = asyncio.create_task(update_timer_display(guild_id))
-        
-        await interaction.response.send_message("Queue started! Timer begins for first person.", ephemeral=True)
+    if result == "missing":
+        await respond(interaction, "No queue panel exists! Use `/goaty` first.", ephemeral=True)
+    elif result == "already":
+        await respond(interaction, "Queue is already active!", ephemeral=True)
+    elif result == "started":
+        await respond(interaction, "Queue started! Timer begins for first person.", ephemeral=True)
     else:
-        await interaction.response.send_message("Queue started! Timer will begin when first person joins.", ephemeral=True)
+        await respond(interaction, "Queue started! Timer will begin when first person joins.", ephemeral=True)
 
 @bot.tree.command(name="stop_queue", description="[ADMIN] Stop the queue and pause timers")
+@admin_throttled
 @app_commands.checks.has_permissions(administrator=True)
 async def stop_queue_cmd(interaction: discord.Interaction):
     """Admin command to stop the queue"""
-    guild_id = interaction.guild_id
-    
-    if guild_id not in queues:
-        await interaction.response.send_message("No queue panel exists!", ephemeral=True)
-        return
-    
-    if not queues[guild_id].get("is_active"):
-        await interaction.response.send_message("Queue is already stopped!", ephemeral=True)
-        return
-    
-    queues[guild_id]["is_active"] = False
+    result = await guild_actors.submit(interaction.guild_id, "stop", interaction.channel_id)
     
-    # Cancel any running timer
-    if queues[guild_id].get("timer_task"):
-        queues[guild_id]["timer_task"].cancel()
-    queues[guild_id]["timer_task"] = None
-    queues[guild_id]["timer_start"] = None
-    
-    # Stop update task
-    if queues[guild_id].get("update_task"):
-        queues[guild_id]["update_task"].cancel()
-        queues[guild_id]["update_task"] = None
-    
-    await update_queue_message(interaction.guild)
-    await interaction.response.send_message("Queue stopped successfully. No timers will run.", ephemeral=True)
+    if result == "missing":
+        await respond(interaction, "No queue panel exists!", ephemeral=True)
+    elif result == "already":
+        await respond(interaction, "Queue is already stopped!", ephemeral=True)
+    else:
+        await respond(interaction, "Queue stopped successfully. No timers will run.", ephemeral=True)
 
 @bot.tree.command(name="clear_queue", description="[ADMIN] Clear the entire queue")
+@admin_throttled
 @app_commands.checks.has_permissions(administrator=True)
 async def clear_queue(interaction: discord.Interaction):
     """Admin command to clear the queue"""
-    guild_id = interaction.guild_id
-    
-    if guild_id not in queues or not queues[guild_id]["queue"]:
-        await interaction.response.send_message("Queue is already empty!", ephemeral=True)
+    if not await guild_actors.submit(interaction.guild_id, "clear", interaction.channel_id):
+        await respond(interaction, "Queue is already empty!", ephemeral=True)
         return
     
-    queues[guild_id]["queue"].clear()
-    
-    # Cancel timer when queue is cleared
-    if queues[guild_id].get("timer_task"):
-        queues[guild_id]["timer_task"].cancel()
-    queues[guild_id]["timer_task"] = None
-    queues[guild_id]["timer_start"] = None
-    
-    # Stop update task
-    if queues[guild_id].get("update_task"):
-        queues[guild_id]["update_task"].cancel()
-        queues[guild_id]["update_task"] = None
-    
-    await update_queue_message(interaction.guild)
-    await interaction.response.send_message("Queue cleared!", ephemeral=True)
+    await respond(interaction, "Queue cleared!", ephemeral=True)
 
-@bot.tree.command(name="next", description="[ADMIN] Call the next person in queue")
+@bot.tree.command(name="next", description="[ADMIN] Call the next person in queue", extras={"public": True})
+@admin_throttled
 @app_commands.checks.has_permissions(administrator=True)
 async def next_in_queue(interaction: discord.Interaction):
     """Admin command to call next person and ping them"""
-    guild_id = interaction.guild_id
+    removed_user_id = await guild_actors.submit(interaction.guild_id, "next", interaction.channel_id)
     
-    if guild_id not in queues or not queues[guild_id]["queue"]:
-        await interaction.response.send_message("Queue is empty!", ephemeral=True)
+    if removed_user_id is None:
+        await respond(interaction, "Queue is empty!", ephemeral=True)
         return
     
-    removed_user_id = queues[guild_id]["queue"].pop(0)
-    removed_user = interaction.guild.get_member(removed_user_id)
+    removed_name = display_name(interaction.guild, removed_user_id)
     
     # Notify who was removed (no ping)
-    if removed_user:
-        await interaction.response.send_message(f"**{removed_user.name}** has been removed from the queue.")
+    if removed_name:
+        await respond(interaction, f"**{removed_name}** has been removed from the queue.")
     else:
-        await interaction.response.send_message(f"User (ID: {removed_user_id}) has been removed from the queue.")
-    
-    await update_queue_message(interaction.guild)
-    
-    # Cancel existing timer
-    if queues[guild_id].get("timer_task"):
-        queues[guild_id]["timer_task"].cancel()
-    
-    # Start timer for next person if queue not empty AND queue is active
-    if queues[guild_id]["queue"] and queues[guild_id].get("is_active"):
-        next_user_id = queues[guild_id]["queue"][0]
-        next_user = interaction.guild.get_member(next_user_id)
-        
-        if next_user:
-            await interaction.channel.send(f"{next_user.mention} **It's your turn now!**")
-        else:
-            await interaction.channel.send(f"<@{next_user_id}> **It's your turn now!**")
-        
-        queues[guild_id]["timer_task"] = asyncio.create_task(start_timer(guild_id))
-        queues[guild_id]["timer_start"] = datetime.now()
-        
-        # Start update task if not already running
-        if not queues[guild_id].get("update_task") or queues[guild_id]["update_task"].done():
-            queues[guild_id]["update_task"] = asyncio.create_task(update_timer_display(guild_id))
-    else:
-        # Queue is empty or inactive, clear timer
-        queues[guild_id]["timer_task"] = None
-        queues[guild_id]["timer_start"] = None
-        
-        # Stop update task
-        if queues[guild_id].get("update_task"):
-            queues[guild_id]["update_task"].cancel()
-            queues[guild_id]["update_task"] = None
+        await respond(interaction, f"User (ID: {removed_user_id}) has been removed from the queue.")
 
 @bot.tree.command(name="remove", description="[ADMIN] Remove a user from queue")
 @app_commands.describe(user="The user to remove from queue")
+@admin_throttled
 @app_commands.checks.has_permissions(administrator=True)
 async def remove_from_queue(interaction: discord.Interaction, user: discord.Member):
     """Admin command to remove specific user from queue"""
-    guild_id = interaction.guild_id
-    
-    if guild_id not in queues or user.id not in queues[guild_id]["queue"]:
-        await interaction.response.send_message(f"{user.mention} is not in the queue!", ephemeral=True)
+    if not await guild_actors.submit(interaction.guild_id, "remove", interaction.channel_id, user.id):
+        await respond(interaction, f"{user.mention} is not in the queue!", ephemeral=True)
         return
     
-    # Check if this user was first in queue
-    was_first = queues[guild_id]["queue"][0] == user.id if queues[guild_id]["queue"] else False
-    
-    queues[guild_id]["queue"].remove(user.id)
-    await update_queue_message(interaction.guild)
-    await interaction.response.send_message(f"Removed **{user.name}** from queue", ephemeral=True)
-    
-    # If the removed person was first, ping the new first person (only if queue is active)
-    if was_first:
-        # Cancel existing timer
-        if queues[guild_id].get("timer_task"):
-            queues[guild_id]["timer_task"].cancel()
-        
-        if queues[guild_id]["queue"] and queues[guild_id].get("is_active"):
-            next_user_id = queues[guild_id]["queue"][0]
-            next_user = interaction.guild.get_member(next_user_id)
-            
-            if next_user:
-                await interaction.channel.send(f"{next_user.mention} **It's your turn now!**")
-            else:
-                await interaction.channel.send(f"<@{next_user_id}> **It's your turn now!**")
-            
-            # Restart timer for next person
-            queues[guild_id]["timer_task"] = asyncio.create_task(start_timer(guild_id))
-            queues[guild_id]["timer_start"] = datetime.now()
-            
-            # Start update task if not already running
-            if not queues[guild_id].get("update_task") or queues[guild_id]["update_task"].done():
-                queues[guild_id]["update_task"] = asyncio.create_task(update_timer_display(guild_id))
-        else:
-            # Queue is empty or inactive, clear timer
-            queues[guild_id]["timer_task"] = None
-            queues[guild_id]["timer_start"] = None
-            
-            # Stop update task
-            if queues[guild_id].get("update_task"):
-                queues[guild_id]["update_task"].cancel()
-                queues[guild_id]["update_task"] = None
+    await respond(interaction, f"Removed **{user.name}** from queue", ephemeral=True)
 
 @bot.tree.command(name="move", description="[ADMIN] Move a user to a specific position")
 @app_commands.describe(user="The user to move", position="New position (1 = front)")
+@admin_throttled
 @app_commands.checks.has_permissions(administrator=True)
 async def move_in_queue(interaction: discord.Interaction, user: discord.Member, position: int):
     """Admin command to reorder queue"""
-    guild_id = interaction.guild_id
+    result, total = await guild_actors.submit(interaction.guild_id, "move", interaction.channel_id, user.id, position)
     
-    if guild_id not in queues or user.id not in queues[guild_id]["queue"]:
-        await interaction.response.send_message(f"{user.mention} is not in the queue!", ephemeral=True)
+    if result == "missing":
+        await respond(interaction, f"{user.mention} is not in the queue!", ephemeral=True)
+    elif result == "out_of_range":
+        await respond(interaction, f"Position must be between 1 and {total}", ephemeral=True)
+    else:
+        await respond(interaction, f"Moved {user.mention} to position **{position}**", ephemeral=True)
+
+@bot.tree.command(name="remove_many", description="[ADMIN] Remove several users from queue at once")
+@app_commands.describe(users="Mentions or user IDs of everyone to remove")
+@admin_throttled
+@app_commands.checks.has_permissions(administrator=True)
+async def remove_many_from_queue(interaction: discord.Interaction, users: str):
+    """Admin command to remove a list of users in one step (one panel edit, at most one ping)"""
+    user_ids = parse_user_ids(users)
+    if not user_ids:
+        await respond(interaction, "Mention the users to remove, or paste their IDs.", ephemeral=True)
         return
     
-    queue = queues[guild_id]["queue"]
+    removed = await guild_actors.submit(interaction.guild_id, "remove_many", interaction.channel_id, user_ids)
     
-    if position < 1 or position > len(queue):
-        await interaction.response.send_message(f"Position must be between 1 and {len(queue)}", ephemeral=True)
+    missing = len(set(user_ids)) - len(removed)
+    note = f" ({missing} not in the queue)" if missing else ""
+    await respond(interaction, f"Removed **{len(removed)}** user(s) from queue{note}", ephemeral=True)
+
+@bot.tree.command(name="reorder", description="[ADMIN] Put a list of users into the given order")
+@app_commands.describe(users="Mentions or user IDs, in the order they should be served", position="Position of the first listed user (default 1 = front)")
+@admin_throttled
+@app_commands.checks.has_permissions(administrator=True)
+async def reorder_queue(interaction: discord.Interaction, users: str, position: int = 1):
+    """Admin command to move several users into consecutive positions in one step"""
+    user_ids = parse_user_ids(users)
+    if not user_ids:
+        await respond(interaction, "Mention the users to reorder, or paste their IDs.", ephemeral=True)
         return
     
-    queue.remove(user.id)
-    queue.insert(position - 1, user.id)
+    result, listed = await guild_actors.submit(interaction.guild_id, "reorder", interaction.channel_id, user_ids, position)
+    
+    if result == "missing":
+        await respond(interaction, "None of those users are in the queue!", ephemeral=True)
+    elif result == "out_of_range":
+        total = len(queues[interaction.guild_id].queue)
+        await respond(interaction, f"{len(listed)} user(s) don't fit starting at position {position} (queue has {total})", ephemeral=True)
+    else:
+        await respond(interaction, f"Moved **{len(listed)}** user(s) to positions **{position}-{position + len(listed) - 1}**", ephemeral=True)
+
+@bot.tree.command(name="export_queue", description="[ADMIN] Download the queue as a JSON or CSV file")
+@app_commands.describe(format="File format")
+@admin_throttled
+@app_commands.checks.has_permissions(administrator=True)
+async def export_queue_cmd(interaction: discord.Interaction, format: Literal["json", "csv"] = "csv"):
+    """Admin command to export the whole queue"""
+    guild_id = interaction.guild_id
+    if guild_id not in queues:
+        await respond(interaction, "No queue exists! Use `/goaty` to create one.", ephemeral=True)
+        return
     
-    await update_queue_message(interaction.guild)
-    await interaction.response.send_message(f"Moved {user.mention} to position **{position}**", ephemeral=True)
+    rows = [
+        (position, user_id, display_name(interaction.guild, user_id))
+        for position, user_id in enumerate(queues[guild_id].queue, 1)
+    ]
+    file = discord.File(io.BytesIO(export_queue(rows, format)), filename=f"queue-{guild_id}.{format}")
+    await respond(interaction, f"Queue export ({len(rows)} people)", file=file, ephemeral=True)
+
+@bot.tree.command(name="import_queue", description="[ADMIN] Replace the queue with a JSON or CSV file")
+@app_commands.describe(file="A file from /export_queue, or a list of user IDs")
+@admin_throttled
+@app_commands.checks.has_permissions(administrator=True)
+async def import_queue_cmd(interaction: discord.Interaction, file: discord.Attachment):
+    """Admin command to load a whole queue in one step (one panel edit, at most one ping)"""
+    # Downloading the file can take a moment, so answer first
+    await respond(interaction, "Importing queue...", ephemeral=True)
     
-    # If the user was moved to position 1 (front), ping them and restart timer (only if queue is active)
-    if position == 1 and queues[guild_id].get("is_active"):
-        # Cancel existing timer
-        if queues[guild_id].get("timer_task"):
-            queues[guild_id]["timer_task"].cancel()
-        
-        await interaction.channel.send(f"{user.mention} **It's your turn now!**")
-        queues[guild_id]["timer_task"] = asyncio.create_task(start_timer(guild_id))
-        queues[guild_id]["timer_start"] = datetime.now()
-        
-        # Start update task if not already running
-        if not queues[guild_id].get("update_task") or queues[guild_id]["update_task"].done():
-            queues[guild_id]["update_task"] = asyncio.create_task(update_timer_display(guild_id))
+    try:
+        # Attachments report their size, so an oversized file is turned away without downloading it
+        if file.size > MAX_IMPORT_SIZE:
+            raise ValueError(f"File is too large (max {MAX_IMPORT_SIZE // 1000} KB)")
+        user_ids = parse_import(file.filename, await file.read())
+    except (ValueError, discord.HTTPException) as e:
+        # The except variable is cleared when the block ends, so the lambda can't close over it
+        error = f"Import failed: {e}"
+        await outbound.submit(ACK, lambda: interaction.edit_original_response(content=error))
+        return
+    
+    total = await guild_actors.submit(interaction.guild_id, "replace", interaction.channel_id, user_ids)
+    if total is None:
+        await outbound.submit(ACK, lambda: interaction.edit_original_response(content="Import failed: the file has invalid user IDs"))
+        return
+    await outbound.submit(ACK, lambda: interaction.edit_original_response(content=f"Imported queue with **{total}** people"))
 
 @bot.tree.command(name="queue_info", description="Check your position in queue")
 async def queue_info(interaction: discord.Interaction):
@@ -597,14 +963,14 @@ async def queue_info(interaction: discord.Interaction):
     guild_id = interaction.guild_id
     user_id = interaction.user.id
     
-    if guild_id not in queues or user_id not in queues[guild_id]["queue"]:
-        await interaction.response.send_message("You're not in the queue!", ephemeral=True)
+    if guild_id not in queues or user_id not in queues[guild_id].queue:
+        await respond(interaction, "You're not in the queue!", ephemeral=True)
         return
     
-    position = queues[guild_id]["queue"].index(user_id) + 1
-    total = len(queues[guild_id]["queue"])
+    position = queues[guild_id].queue.position(user_id)
+    total = len(queues[guild_id].queue)
     
-    await interaction.response.send_message(f"You're at position **{position}** out of **{total}**", ephemeral=True)
+    await respond(interaction, f"You're at position **{position}** out of **{total}**", ephemeral=True)
 
 @bot.tree.command(name="show_queue", description="Show the current queue list")
 async def show_queue(interaction: discord.Interaction):
@@ -612,54 +978,145 @@ async def show_queue(interaction: discord.Interaction):
     guild_id = interaction.guild_id
     
     if guild_id not in queues:
-        await interaction.response.send_message("No queue exists! Use `/goaty` to create one.", ephemeral=True)
+        await respond(interaction, "No queue exists! Use `/goaty` to create one.", ephemeral=True)
         return
     
-    queue_list = queues[guild_id]["queue"]
+    queue_list = queues[guild_id].queue
     
     if not queue_list:
-        await interaction.response.send_message("The queue is currently empty.", ephemeral=True)
+        await respond(interaction, "The queue is currently empty.", ephemeral=True)
         return
     
-    # Build a simple list showing positions
-    response = f"**Current Queue ({len(queue_list)} people):**\n"
-    for idx, user_id in enumerate(queue_list[:25], 1):  # Show up to 25
-        user = interaction.guild.get_member(user_id)
-        if user:
-            response += f"{idx}. {user.mention}\n"
-        else:
-            response += f"{idx}. <@{user_id}>\n"
+    text, start, total = queue_pages.get(guild_id, queue_list, 0)
+    await respond(interaction, text, view=QueuePageView(start, total), ephemeral=True)
+
+# Pages of /show_queue, cached until the queue changes
+queue_pages = QueuePages(page_size=20)
+
+async def show_queue_page(interaction: discord.Interaction, start: int):
+    """Swap the paginated queue message to the page starting at a 0-based position"""
+    data = queues.get(interaction.guild_id)
+    if not data or not data.queue:
+        await edit_response(interaction, content="The queue is currently empty.", view=None)
+        return
     
-    if len(queue_list) > 25:
-        response += f"\n*...and {len(queue_list) - 25} more*"
+    text, start, total = queue_pages.get(interaction.guild_id, data.queue, start)
+    await edit_response(interaction, content=text, view=QueuePageView(start, total))
+
+class QueuePageButton(discord.ui.DynamicItem[discord.ui.Button], template=r"queue_page:(?P<direction>prev|next):(?P<start>[0-9]+)"):
+    """Prev/next button; the page it leads to is stored in its custom ID so it survives restarts"""
+    def __init__(self, direction: str, start: int, disabled: bool = False):
+        super().__init__(discord.ui.Button(
+            label="Previous" if direction == "prev" else "Next",
+            style=discord.ButtonStyle.gray,
+            custom_id=f"queue_page:{direction}:{start}",
+            disabled=disabled,
+            row=0,
+        ))
+        self.start = start
+    
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match["direction"], int(match["start"]))
     
-    await interaction.response.send_message(response, ephemeral=True)
+    async def callback(self, interaction: discord.Interaction):
+        await show_queue_page(interaction, self.start)
 
-class HealthCheckHandler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        self.send_response(200)
-        self.send_header('Content-type', 'text/plain')
-        self.end_headers()
-        self.wfile.write(b'Bot is running')
+class QueueJumpModal(discord.ui.Modal, title="Jump to position"):
+    position = discord.ui.TextInput(label="Position", placeholder="e.g. 250", max_length=7)
     
-    def log_message(self, format, *args):
-        pass  # Suppress logs
+    async def on_submit(self, interaction: discord.Interaction):
+        if not self.position.value.isdigit():
+            await respond(interaction, "Enter a position number.", ephemeral=True)
+            return
+        await show_queue_page(interaction, queue_pages.page_start(int(self.position.value)))
 
-def run_health_server():
-    port = int(os.getenv('PORT', 10000))
-    server = HTTPServer(('0.0.0.0', port), HealthCheckHandler)
-    print(f"Health check server running on port {port}")
-    server.serve_forever()
+class QueuePageView(discord.ui.View):
+    def __init__(self, start: int = 0, total: int = 0):
+        super().__init__(timeout=None)  # Persistent view
+        size = queue_pages.page_size
+        self.add_item(QueuePageButton("prev", max(0, start - size), disabled=start == 0))
+        self.add_item(QueuePageButton("next", start + size, disabled=start + size >= total))
+    
+    @discord.ui.button(label="Jump to...", style=discord.ButtonStyle.blurple, custom_id="queue_page_jump", row=0)
+    async def jump_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await acknowledge(interaction, lambda: interaction.response.send_modal(QueueJumpModal()))
 
-if __name__ == "__main__":
-    # Start health check server in background thread
-    health_thread = Thread(target=run_health_server, daemon=True)
-    health_thread.start()
-    print(f"Health check server started on port {os.getenv('PORT', 10000)}")
+# Readiness fails when the loop is this many seconds behind
+READY_MAX_LOOP_LAG = float(os.getenv("READY_MAX_LOOP_LAG", 2.0))
+
+# A loop stuck this many seconds gets the blocking code's stack logged while it's stuck (0 = off)
+LOOP_STALL_THRESHOLD = float(os.getenv("LOOP_STALL_THRESHOLD", 1.0))
+
+loop_stalls = metrics.histogram(
+    "goaty_event_loop_stall_seconds", "Event loop stalls longer than LOOP_STALL_THRESHOLD",
+    buckets=(1.0, 2.0, 3.0, 5.0, 10.0, 30.0, 60.0),
+)
+
+def on_loop_stall(seconds: float, stack: Optional[str]):
+    loop_stalls.observe(seconds)
+    where = "" if stack else " (too short to catch the stack)"
+    print(f"Event loop stalled for {seconds:.2f}s{where}")
+
+loop_lag = LoopLagProbe(stall_after=LOOP_STALL_THRESHOLD or None, on_stall=on_loop_stall)
+metrics.gauge("goaty_event_loop_lag_seconds", "Latest event loop lag measurement", lambda: {(): loop_lag.lag})
+
+def gateway_connected() -> bool:
+    if not bot.is_ready() or bot.is_closed():
+        return False
+    if SHARD_COUNT:
+        return all(not shard.is_closed() and math.isfinite(shard.latency) for shard in bot.shards.values())
+    return math.isfinite(bot.latency)
+
+def healthz():
+    # Answering at all means the process and its event loop are alive
+    return 200, "text/plain", b"Bot is running"
+
+def readyz():
+    connected = gateway_connected()
+    ready = connected and loop_lag.lag < READY_MAX_LOOP_LAG
+    report = {
+        "ready": ready,
+        "gateway_connected": connected,
+        "loop_lag": round(loop_lag.lag, 4),
+        "latency": round(bot.latency, 4) if math.isfinite(bot.latency) else None,
+    }
+    return (200 if ready else 503), "application/json", json.dumps(report).encode()
+
+def metrics_page():
+    return 200, "text/plain; version=0.0.4", metrics.render()
+
+health_server = HealthServer(
+    int(os.getenv("PORT", 10000)),
+    {"/": healthz, "/healthz": healthz, "/readyz": readyz, "/metrics": metrics_page},
+)
+
+async def main():
+    # The health endpoint shares the bot's loop, so it is up before the gateway connects
+    await health_server.start()
+    loop_lag.start()
     
-    # Give the health server a moment to start
-    import time
-    time.sleep(2)
+    # Shut down cleanly on Ctrl+C or the launcher's SIGTERM, like bot.run does
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, lambda: spawn(bot.close()))
+        except NotImplementedError:
+            # Windows: Ctrl+C arrives as KeyboardInterrupt, which cancels main() and still runs the cleanup below
+            break
     
-    # Run the bot
-    bot.run(BOT_TOKEN)
\ No newline at end of file
+    try:
+        async with bot:
+            await bot.start(BOT_TOKEN)
+    finally:
+        await health_server.close()
+        store.close()
+        if tracer:
+            tracer.close()
+
+if __name__ == "__main__":
+    discord.utils.setup_logging()
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,33 @@
+import hashlib
+import json
+
+
+def command_tree_hash(tree, guild=None):
+    """Stable hash of the command payloads ``tree.sync(guild=guild)`` would upload"""
+    payload = sorted(
+        (command.to_dict(tree) for command in tree.get_commands(guild=guild)),
+        key=lambda command: (command.get("type", 1), command["name"]),
+    )
+    scope = guild.id if guild else "global"
+    blob = json.dumps({"scope": scope, "commands": payload}, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+async def sync_if_changed(tree, path, guild=None):
+    """Sync the command tree only if it differs from the last successful sync.
+
+    The hash of the last synced tree is kept in ``path``. Returns the number
+    of commands synced, or None if the tree was unchanged and nothing was sent.
+    """
+    digest = command_tree_hash(tree, guild)
+    try:
+        with open(path) as f:
+            if f.read().strip() == digest:
+                return None
+    except OSError:
+        pass
+
+    synced = await tree.sync(guild=guild)
+    with open(path, "w") as f:
+        f.write(digest)
+    return len(synced)
@@ -0,0 +1,178 @@
+import asyncio
+import heapq
+import itertools
+
+import discord
+
+# Priority classes, most urgent first
+ACK = 0   # interaction responses (Discord's 3-second window)
+PING = 1  # turn pings and expiry notices
+EDIT = 2  # panel posts and edits
+
+CLASS_NAMES = {ACK: "ack", PING: "ping", EDIT: "edit"}
+
+
+class _Job:
+    __slots__ = ("priority", "call", "key", "lane", "future", "queued_at", "attempts", "dropped", "in_heap")
+
+    def __init__(self, priority, call, key, lane, future, queued_at):
+        self.priority = priority
+        self.call = call
+        self.key = key
+        self.lane = lane
+        self.future = future
+        self.queued_at = queued_at
+        self.attempts = 0
+        self.dropped = False
+        self.in_heap = False
+
+
+class ClassStats:
+    __slots__ = ("depth", "sent", "dropped", "retried", "total_wait", "max_wait")
+
+    def __init__(self):
+        self.depth = 0
+        self.sent = 0
+        self.dropped = 0
+        self.retried = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def avg_wait(self):
+        return self.total_wait / self.sent if self.sent else 0.0
+
+
+def retry_after(error):
+    """Seconds to back off for a rate-limited call, or None if it wasn't rate limited"""
+    if isinstance(error, discord.RateLimited):
+        return error.retry_after
+    if isinstance(error, discord.HTTPException) and error.status == 429:
+        try:
+            return float(error.response.headers.get("Retry-After", 1))
+        except (AttributeError, TypeError, ValueError):
+            return 1.0
+    return None
+
+
+class OutboundDispatcher:
+    """Runs every outbound REST call in priority order: acks, then pings, then panel edits.
+
+    ``submit`` takes a zero-argument callable that makes the call and returns
+    a future for its result. Acks start immediately because they must land
+    within Discord's window. Pings and edits go into the heap of their
+    ``lane``, the channel they post to, and each lane has its own worker
+    running one call at a time, most urgent first. discord.py waits out an
+    exhausted rate limit bucket inside the call, so a slow edit only holds
+    up its own channel. Submitting with a ``key`` drops any job with the
+    same key that hasn't started yet, so only the newest panel edit is sent.
+    A rate-limited job is re-queued after its retry-after and frees its lane
+    while it waits.
+    """
+
+    def __init__(self, max_attempts=3):
+        self.max_attempts = max_attempts
+        self.stats = {priority: ClassStats() for priority in CLASS_NAMES}
+        self._seq = itertools.count()
+        self._keyed = {}
+        self._lanes = {}    # lane -> heap of waiting jobs
+        self._workers = {}  # lane -> worker task, while the lane has work
+        self._tasks = set()  # running acks; the loop only keeps weak references
+
+    def __len__(self):
+        """Jobs waiting in any lane"""
+        return sum(stats.depth for stats in self.stats.values())
+
+    def submit(self, priority, call, key=None, lane=None):
+        loop = asyncio.get_running_loop()
+        job = _Job(priority, call, key, lane, loop.create_future(), loop.time())
+        if priority == ACK:
+            task = asyncio.create_task(self._run_job(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            return job.future
+
+        if key is not None:
+            superseded = self._keyed.get(key)
+            if superseded:
+                superseded.dropped = True
+                if superseded.in_heap:
+                    self.stats[superseded.priority].depth -= 1
+                self.stats[superseded.priority].dropped += 1
+                if not superseded.future.done():
+                    superseded.future.set_result(None)
+            self._keyed[key] = job
+        self._push(job)
+        return job.future
+
+    def snapshot(self):
+        """Per-class queue depth and wait-time statistics"""
+        return {
+            CLASS_NAMES[priority]: {
+                "depth": stats.depth,
+                "sent": stats.sent,
+                "dropped": stats.dropped,
+                "retried": stats.retried,
+                "avg_wait": stats.avg_wait,
+                "max_wait": stats.max_wait,
+            }
+            for priority, stats in self.stats.items()
+        }
+
+    def _push(self, job):
+        if job.dropped:
+            return
+        self.stats[job.priority].depth += 1
+        job.in_heap = True
+        heapq.heappush(self._lanes.setdefault(job.lane, []), (job.priority, next(self._seq), job))
+        if job.lane not in self._workers:
+            self._workers[job.lane] = asyncio.create_task(self._work(job.lane))
+
+    async def _work(self, lane):
+        heap = self._lanes[lane]
+        try:
+            while heap:
+                _, _, job = heapq.heappop(heap)
+                if job.dropped:
+                    continue
+                job.in_heap = False
+                self.stats[job.priority].depth -= 1
+                if job.key is not None and self._keyed.get(job.key) is job:
+                    del self._keyed[job.key]
+                await self._run_job(job)
+        finally:
+            # Idle lanes cost nothing; the next push starts a fresh worker
+            del self._workers[lane]
+            if not heap:
+                del self._lanes[lane]
+
+    async def _run_job(self, job):
+        loop = asyncio.get_running_loop()
+        stats = self.stats[job.priority]
+        if job.attempts == 0:
+            waited = loop.time() - job.queued_at
+            stats.sent += 1
+            stats.total_wait += waited
+            stats.max_wait = max(stats.max_wait, waited)
+        job.attempts += 1
+        try:
+            result = await job.call()
+        except Exception as e:
+            delay = retry_after(e)
+            if delay is not None and job.attempts < self.max_attempts and job.priority != ACK:
+                if job.key is not None:
+                    if job.key in self._keyed:
+                        # A newer version is already waiting; don't resend this one
+                        stats.dropped += 1
+                        if not job.future.done():
+                            job.future.set_result(None)
+                        return
+                    self._keyed[job.key] = job
+                stats.retried += 1
+                loop.call_later(delay, self._push, job)
+                return
+            if not job.future.done():
+                job.future.set_exception(e)
+            return
+        if not job.future.done():
+            job.future.set_result(result)
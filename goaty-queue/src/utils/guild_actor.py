@@ -0,0 +1,66 @@
+import asyncio
+from collections import deque
+
+
+class GuildActors:
+    """Serializes every queue mutation for a guild through one mailbox.
+
+    ``apply(guild_id, command)`` is synchronous and returns ``(result, effects)``;
+    it is the only place queue state changes, so each command sees the state
+    left by the previous one and nothing can interleave with it. A guild's
+    worker drains everything waiting in its mailbox, applies the whole batch,
+    resolves each caller's future, and hands the batch's effects to the
+    guild's sender, which awaits ``run_effects(guild_id, effects)`` in order.
+    Slow sends therefore never delay applying (and acknowledging) the next
+    commands; effects queued while a send is in flight go out as one batch.
+    """
+
+    def __init__(self, apply, run_effects):
+        self._apply = apply
+        self._run_effects = run_effects
+        self._mailboxes = {}
+        self._workers = {}
+        self._outboxes = {}
+        self._senders = {}
+
+    def submit(self, guild_id, *command):
+        """Queue a command; the returned future resolves to its result once applied"""
+        future = asyncio.get_running_loop().create_future()
+        self._mailboxes.setdefault(guild_id, deque()).append((command, future))
+        if guild_id not in self._workers:
+            self._workers[guild_id] = asyncio.create_task(self._run(guild_id))
+        return future
+
+    async def _run(self, guild_id):
+        # Started on the next loop iteration, so commands submitted in the
+        # meantime are applied as one batch. Nothing in here awaits.
+        mailbox = self._mailboxes.pop(guild_id)
+        del self._workers[guild_id]
+        effects = []
+        while mailbox:
+            command, future = mailbox.popleft()
+            try:
+                result, command_effects = self._apply(guild_id, command)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            effects.extend(command_effects)
+            if not future.done():
+                future.set_result(result)
+
+        if effects:
+            self._outboxes.setdefault(guild_id, []).extend(effects)
+            if guild_id not in self._senders:
+                self._senders[guild_id] = asyncio.create_task(self._send(guild_id))
+
+    async def _send(self, guild_id):
+        try:
+            while self._outboxes.get(guild_id):
+                effects = self._outboxes.pop(guild_id)
+                try:
+                    await self._run_effects(guild_id, effects)
+                except Exception as e:
+                    print(f"Failed to run queue effects for guild {guild_id}: {e}")
+        finally:
+            del self._senders[guild_id]
@@ -0,0 +1,42 @@
+from utils.queue_manager import QueueManager
+
+
+class GuildQueueState:
+    """One guild's queue and panel.
+
+    ``queue``, ``message_id``, ``channel_id``, ``is_active``, ``timer_start``
+    and ``priority_streak`` are what queue_machine commands read and change
+    and what the store persists. ``panel_message``, ``timer_handle`` and
+    ``refresh_handle`` are the bot's live handles, and ``deadline`` (event
+    loop clock) and ``ends_at`` (epoch seconds, for Discord timestamps) mark
+    when the running turn ends; none of these are saved.
+    Slots instead of a per-guild dict keep an idle guild to one small object.
+    """
+
+    __slots__ = (
+        "queue", "message_id", "channel_id", "is_active", "timer_start", "priority_streak",
+        "panel_message", "timer_handle", "refresh_handle", "deadline", "ends_at",
+    )
+
+    def __init__(self, queue=None, message_id=None, channel_id=None, is_active=False, timer_start=None):
+        self.queue = queue if queue is not None else QueueManager()
+        self.message_id = message_id
+        self.channel_id = channel_id
+        self.is_active = is_active
+        self.timer_start = timer_start
+        self.priority_streak = 0
+        self.panel_message = None
+        self.timer_handle = None
+        self.refresh_handle = None
+        self.deadline = None
+        self.ends_at = None
+
+    def reset(self):
+        """Forget the queue and the panel (the bot cancels the live handles itself)"""
+        self.queue = QueueManager()
+        self.message_id = None
+        self.channel_id = None
+        self.is_active = False
+        self.timer_start = None
+        self.priority_streak = 0
+
@@ -0,0 +1,119 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+
+STATUS_TEXT = {200: "OK", 404: "Not Found", 503: "Service Unavailable"}
+
+# Innermost frames of the loop thread's stack printed for a stall
+STALL_STACK_DEPTH = 12
+
+# Give up on clients that don't send a request line and headers within this many seconds
+REQUEST_TIMEOUT = 5
+
+
+class LoopLagProbe:
+    """Measures event loop lag continuously: how late a short sleep wakes up.
+
+    ``lag`` is the latest measurement. A loop blocked by a handler can't run
+    the probe either, so a blocked loop shows up as one large reading once
+    it frees up, and as a request timeout on the health endpoint meanwhile.
+
+    With ``stall_after`` set, a watchdog thread also watches the probe's
+    heartbeat. Once the loop has been stuck for that many seconds it prints
+    the loop thread's current stack, which names the handler doing the
+    blocking, while the stall is still going on. When the loop gets going
+    again, ``on_stall(seconds, stack)`` is called on the loop with the
+    stall's length and that stack (None if the thread didn't catch it).
+    """
+
+    def __init__(self, interval=0.5, stall_after=None, on_stall=None):
+        self.interval = interval
+        self.stall_after = stall_after
+        self.on_stall = on_stall
+        self.lag = 0.0
+        self._task = None
+        self._beat = time.monotonic()
+        self._loop_thread = None
+        self._stall_stack = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            if self.stall_after:
+                self._loop_thread = threading.get_ident()
+                threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            self._beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, loop.time() - expected)
+            stack, self._stall_stack = self._stall_stack, None
+            if self.on_stall and self.stall_after and self.lag >= self.stall_after:
+                self.on_stall(self.lag, stack)
+
+    def _watch(self):
+        while True:
+            time.sleep(self.interval / 2)
+            blocked = time.monotonic() - self._beat - self.interval
+            if blocked < self.stall_after or self._stall_stack is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            self._stall_stack = "".join(traceback.format_stack(frame, limit=STALL_STACK_DEPTH)) if frame else ""
+            print(f"Event loop blocked for {blocked:.1f}s so far, currently in:\n{self._stall_stack}", end="")
+
+
+class HealthServer:
+    """Tiny HTTP/1.0 server running on the bot's own event loop.
+
+    ``routes`` maps a path to a zero-argument callable that returns
+    ``(status, content_type, body)``, where body is bytes. Every response
+    closes the connection.
+    """
+
+    def __init__(self, port, routes, host="0.0.0.0"):
+        self.host = host
+        self.port = port
+        self.routes = routes
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        print(f"Health check server running on port {self.port}")
+
+    async def close(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), REQUEST_TIMEOUT)
+            # Skip the headers; no route needs them
+            while True:
+                line = await asyncio.wait_for(reader.readline(), REQUEST_TIMEOUT)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+            parts = request_line.decode("latin-1").split()
+            path = parts[1].split("?", 1)[0] if len(parts) > 1 else "/"
+            route = self.routes.get(path)
+            if route:
+                status, content_type, body = route()
+            else:
+                status, content_type, body = 404, "text/plain", b"Not found"
+            head = (
+                f"HTTP/1.0 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n"
+            )
+            writer.write(head.encode("latin-1") + body)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,24 @@
+from collections import OrderedDict
+
+
+class NameCache:
+    """Bounded LRU of user ID -> username, filled from interaction payloads.
+
+    Used instead of the member cache when the members intent is off.
+    """
+
+    def __init__(self, maxsize=10_000):
+        self.maxsize = maxsize
+        self._names = OrderedDict()
+
+    def remember(self, user):
+        self._names[user.id] = user.name
+        self._names.move_to_end(user.id)
+        if len(self._names) > self.maxsize:
+            self._names.popitem(last=False)
+
+    def get(self, user_id):
+        name = self._names.get(user_id)
+        if name is not None:
+            self._names.move_to_end(user_id)
+        return name
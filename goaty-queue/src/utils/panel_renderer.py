@@ -0,0 +1,107 @@
+import discord
+
+
+class PanelRenderer:
+    """Builds the queue panel embed incrementally.
+
+    The caller passes the running turn's end once per render, as an epoch
+    time for Discord timestamps and as seconds remaining on the monotonic
+    clock for the polling countdown, and the wait estimates for every
+    visible row come from those values. Each row's text is cached under
+    a key of (user, position, left server, timing), so only rows whose key
+    changed since the guild's last render are formatted again. The embed
+    last posted to each panel is remembered, so a render identical to it
+    needs no edit at all.
+    """
+
+    def __init__(self, timer_duration, timestamps=True, visible_rows=10):
+        self.timer_duration = timer_duration
+        self.timestamps = timestamps
+        self.visible_rows = visible_rows
+        self._rows = {}    # guild_id -> {row key: line} from the last render
+        self._posted = {}  # guild_id -> embed dict currently on the panel
+
+    def build(self, guild_id, queue, is_active, ends_at, remaining, has_left):
+        """Render the panel; has_left(user_id) says whether to flag someone as gone.
+
+        ends_at and remaining are None when no turn is running.
+        """
+        total = len(queue)
+        status_text = "ACTIVE" if is_active else "STOPPED"
+
+        # Calculate remaining time if timer is active
+        timer_text = "\n**Time per person:** 6 minutes"
+        deadline = None
+        if not is_active or ends_at is None:
+            remaining = None
+        elif self.timestamps:
+            deadline = int(ends_at)
+            remaining = None
+            if total:
+                timer_text += f"\n**Turn ends:** <t:{deadline}:R> (<t:{deadline}:T>)"
+        else:
+            # Refreshes land on whole intervals before the deadline; round off the scheduling jitter
+            remaining = round(max(0.0, remaining))
+            if total:
+                timer_text += f"\n**Time remaining:** {remaining // 60}:{remaining % 60:02d}"
+
+        embed = discord.Embed(
+            title="Queue System",
+            description=f"**Status:** {status_text}\n**Total in queue:** {total}{timer_text}",
+            color=discord.Color.green() if is_active else discord.Color.red()
+        )
+
+        if not total:
+            self._rows.pop(guild_id, None)
+            embed.add_field(name="Current Queue", value="*Queue is empty*", inline=False)
+            return embed
+
+        previous = self._rows.get(guild_id, {})
+        current = {}
+        lines = []
+        for idx, user_id in enumerate(queue.get_range(0, self.visible_rows), 1):
+            key = (user_id, idx, has_left(user_id), deadline, remaining)
+            line = previous.get(key)
+            if line is None:
+                line = self._format_row(key)
+            current[key] = line
+            lines.append(line)
+        self._rows[guild_id] = current
+
+        embed.add_field(name="Current Queue", value="".join(lines), inline=False)
+        if total > self.visible_rows:
+            embed.add_field(name="", value=f"*...and {total - self.visible_rows} more*", inline=False)
+        return embed
+
+    def _format_row(self, key):
+        user_id, idx, left, deadline, remaining = key
+        wait_info = ""
+        if deadline is not None:
+            if idx == 1:
+                wait_info = f" ends <t:{deadline}:R>"
+            else:
+                # Estimated start: everyone ahead uses their full timer
+                wait_info = f" starts ~<t:{deadline + (idx - 2) * self.timer_duration}:R>"
+        elif remaining is not None:
+            if idx == 1:
+                wait_info = f" `{remaining // 60}:{remaining % 60:02d} remaining`"
+            else:
+                # Each person before them has their full timer duration, except the first person
+                wait = remaining + (idx - 2) * self.timer_duration
+                wait_info = f" `~{wait // 60}:{wait % 60:02d} wait`"
+
+        if left:
+            return f"**{idx}.** <@{user_id}> (left server){wait_info}\n"
+        return f"**{idx}.** <@{user_id}>{wait_info}\n"
+
+    def changed(self, guild_id, embed):
+        """Whether the embed differs from what the panel already shows"""
+        return self._posted.get(guild_id) != embed.to_dict()
+
+    def posted(self, guild_id, embed):
+        self._posted[guild_id] = embed.to_dict()
+
+    def forget(self, guild_id):
+        """Drop cached state, e.g. when the panel message is replaced"""
+        self._rows.pop(guild_id, None)
+        self._posted.pop(guild_id, None)
@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+import re
+
+from utils.queue_manager import MAX_USER_ID
+
+# Discord IDs are 17-20 digit snowflakes; mentions look like <@123> or <@!123>
+USER_ID_PATTERN = re.compile(r"\b\d{17,20}\b")
+
+# Largest import we accept, in bytes
+MAX_IMPORT_SIZE = 1_000_000
+
+
+def parse_user_ids(text):
+    """User IDs from free text such as "@alice @bob 123..." (mentions or raw IDs), in order"""
+    return [int(user_id) for user_id in USER_ID_PATTERN.findall(text)]
+
+
+def export_queue(rows, fmt):
+    """Serialize [(position, user_id, name)] as "json" or "csv" bytes.
+
+    IDs are written as strings so JSON tools don't round them.
+    """
+    if fmt == "json":
+        entries = [{"position": position, "user_id": str(user_id), "name": name or ""} for position, user_id, name in rows]
+        return json.dumps({"queue": entries}, indent=2).encode()
+
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["position", "user_id", "name"])
+    for position, user_id, name in rows:
+        writer.writerow([position, user_id, name or ""])
+    return out.getvalue().encode()
+
+
+def parse_import(filename, data):
+    """User IDs, in queue order, from an exported (or hand-written) JSON or CSV file.
+
+    JSON may be {"queue": [...]} or a bare list whose items are IDs or objects
+    with a "user_id". CSV uses the "user_id" column if there is a header,
+    otherwise the first column. Raises ValueError if the file can't be read
+    or holds anything that isn't a valid (nonzero, 64-bit) user ID.
+    """
+    if len(data) > MAX_IMPORT_SIZE:
+        raise ValueError(f"File is too large (max {MAX_IMPORT_SIZE // 1000} KB)")
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise ValueError("File must be UTF-8 text")
+
+    if filename.lower().endswith(".json") or text.lstrip().startswith(("{", "[")):
+        try:
+            entries = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON: {e}")
+        if isinstance(entries, dict):
+            entries = entries.get("queue", [])
+        if not isinstance(entries, list):
+            raise ValueError('JSON must be a list of user IDs or {"queue": [...]}')
+        values = [entry.get("user_id") if isinstance(entry, dict) else entry for entry in entries]
+    else:
+        rows = [row for row in csv.reader(io.StringIO(text)) if row]
+        column = 0
+        if rows and not rows[0][0].strip().isdigit():
+            header = [cell.strip().lower() for cell in rows.pop(0)]
+            column = header.index("user_id") if "user_id" in header else 0
+        values = [row[column] if column < len(row) else None for row in rows]
+
+    user_ids = []
+    for value in values:
+        value = str(value).strip()
+        if not (value.isascii() and value.isdigit()) or not 0 < int(value) <= MAX_USER_ID:
+            raise ValueError(f"Not a user ID: {value!r}")
+        user_ids.append(int(value))
+    return user_ids
@@ -0,0 +1,324 @@
+"""The queue's transition engine.
+
+Every queue command is a synchronous function ``(state, *args, now)`` that
+updates one guild's state and returns ``(result, effects)``. It never does
+I/O, schedules anything or reads the clock (``now`` is passed in), so the
+same command on the same state always does the same thing, and a batch of
+commands can run back to back at full speed. The caller's executor carries
+out the effects:
+
+    ("log", op, target, arg)       persist a mutation (QueueStore.record)
+    ("arm_timer", timer_start)     start the turn timer for a turn begun at timer_start
+    ("cancel_timer",)              stop the turn timer and countdown refreshes
+    ("render",)                    refresh the panel
+    ("turn", channel_id, user_id, queue_started)   ping whoever's turn it is now
+    ("expired", channel_id, user_id)               tell someone their time ran out
+
+A state is a GuildQueueState; commands only touch ``queue`` (QueueManager),
+``is_active``, ``timer_start``, ``channel_id``, ``message_id`` and
+``priority_streak``.
+``channel_id`` in a command is where it came from, or None for the panel's.
+
+Priority tiers: a user joining with a tier goes after everyone of the same
+or a better tier (FIFO within a tier), but never ahead of a turn already
+running. With ``AGING_TURNS`` set, once that many turns in a row have gone
+to a better tier while someone of a lower tier waited, the longest-waiting
+of them is lifted into the current tier and goes next, so low tiers can't
+starve. The streak lives in ``state.priority_streak`` and isn't saved.
+"""
+from utils.queue_manager import MAX_USER_ID
+
+RENDER = ("render",)
+CANCEL_TIMER = ("cancel_timer",)
+
+# Turns a lower tier can be passed over before its longest waiter goes next; 0 turns aging off
+AGING_TURNS = 0
+
+
+def _outranks(tier, other):
+    """Whether someone of ``tier`` goes ahead of (or level with) someone of ``other``"""
+    return tier is not None and (other is None or tier <= other)
+
+
+def _begin_turn(state, channel_id, now, effects, queue_started=False):
+    """Ping the first person in queue and start their timer"""
+    state.timer_start = now
+    effects.append(("turn", channel_id or state.channel_id, state.queue.next_in_queue(), queue_started))
+    effects.append(("arm_timer", now))
+    effects.append(("log", "timer", None, now.timestamp()))
+
+
+def _cancel_turn(state, effects):
+    effects.append(CANCEL_TIMER)
+    if state.timer_start:
+        effects.append(("log", "timer", None, None))
+    state.timer_start = None
+
+
+def _age(state, effects):
+    """Before a turn: lift the longest-waiting lower-tier user to the front if they've waited long enough"""
+    queue = state.queue
+    head_tier = queue.tier_of(queue.next_in_queue())
+    # The first user after the head's tier block is the oldest with a worse tier
+    behind = queue.get_range(queue.tier_position(head_tier) - 1, 1) if head_tier is not None else []
+    if not behind:
+        state.priority_streak = 0
+        return
+
+    streak = state.priority_streak + 1
+    if streak > AGING_TURNS:
+        queue.set_tier(behind[0], head_tier)
+        queue.move_user(behind[0], 1)
+        effects.append(("log", "tier", behind[0], head_tier))
+        effects.append(("log", "move", behind[0], 1))
+        streak = 0
+    state.priority_streak = streak
+
+
+def _advance_turn(state, channel_id, now, effects):
+    """The first person changed: start the new first person's turn if the queue is active"""
+    _cancel_turn(state, effects)
+    if state.queue and state.is_active:
+        if AGING_TURNS:
+            _age(state, effects)
+        _begin_turn(state, channel_id, now, effects)
+
+
+def join(state, channel_id, user_id, tier, now):
+    queue = state.queue
+    if not queue.join_queue(user_id):
+        return None, []
+
+    effects = [("log", "join", user_id, None)]
+    position = len(queue)
+    if tier is not None:
+        position = queue.tier_position(tier)
+        queue.set_tier(user_id, tier)
+        effects.append(("log", "tier", user_id, tier))
+        # Don't cut in on a turn that's already running
+        head = queue.next_in_queue()
+        if state.timer_start and head != user_id and not _outranks(queue.tier_of(head), tier):
+            position += 1
+        if position < len(queue):
+            queue.move_user(user_id, position)
+            effects.append(("log", "move", user_id, position))
+        else:
+            position = len(queue)
+
+    effects.append(RENDER)
+    # Only start timer if queue is active and this is the first person
+    if position == 1 and state.is_active:
+        _begin_turn(state, channel_id, now, effects)
+    return position, effects
+
+
+def leave(state, channel_id, user_id, now, op="leave"):
+    if state is None or user_id not in state.queue:
+        return False, []
+
+    was_first = state.queue.next_in_queue() == user_id
+    state.queue.leave_queue(user_id)
+
+    effects = [("log", op, user_id, None), RENDER]
+    # If the person who left was first, ping the new first person (only if queue is active)
+    if was_first:
+        _advance_turn(state, channel_id, now, effects)
+    return True, effects
+
+
+def remove(state, channel_id, user_id, now):
+    return leave(state, channel_id, user_id, now, op="remove")
+
+
+def next_turn(state, channel_id, now):
+    if state is None or not state.queue:
+        return None, []
+
+    removed_user_id = state.queue.remove_next()
+    effects = [("log", "next", None, None), RENDER]
+    _advance_turn(state, channel_id, now, effects)
+    return removed_user_id, effects
+
+
+def expire(state, channel_id, timer_start, now):
+    # Stale expiry: the turn was restarted or cancelled while this command waited
+    if state is None or state.timer_start is not timer_start:
+        return None, []
+
+    if not state.queue:
+        effects = []
+        _cancel_turn(state, effects)
+        return None, effects
+
+    removed_user_id = state.queue.remove_next()
+    effects = [("log", "next", None, None), RENDER, ("expired", state.channel_id, removed_user_id)]
+    _advance_turn(state, channel_id, now, effects)
+    return removed_user_id, effects
+
+
+def move(state, channel_id, user_id, position, now):
+    if state is None or user_id not in state.queue:
+        return ("missing", 0), []
+
+    if position < 1 or position > len(state.queue):
+        return ("out_of_range", len(state.queue)), []
+
+    first_before = state.queue.next_in_queue()
+    state.queue.move_user(user_id, position)
+    effects = [("log", "move", user_id, position), RENDER]
+    # Moving someone to or away from the front hands the turn to whoever is first now
+    _settle_first(state, channel_id, now, effects, first_before)
+    return ("moved", len(state.queue)), effects
+
+
+def clear(state, channel_id, now):
+    if state is None or not state.queue:
+        return False, []
+
+    state.queue.clear()
+    effects = [("log", "clear", None, None)]
+    _cancel_turn(state, effects)
+    effects.append(RENDER)
+    return True, effects
+
+
+def start(state, channel_id, now):
+    if state is None:
+        return "missing", []
+    if state.is_active:
+        return "already", []
+
+    state.is_active = True
+    effects = [("log", "start", None, None), RENDER]
+    # If there's someone in queue, ping them and start their timer
+    if state.queue:
+        _begin_turn(state, channel_id, now, effects, queue_started=True)
+        return "started", effects
+    return "waiting", effects
+
+
+def stop(state, channel_id, now):
+    if state is None:
+        return "missing", []
+    if not state.is_active:
+        return "already", []
+
+    state.is_active = False
+    effects = [("log", "stop", None, None)]
+    _cancel_turn(state, effects)
+    effects.append(RENDER)
+    return "stopped", effects
+
+
+def _settle_first(state, channel_id, now, effects, first_before):
+    """After a bulk change: one turn change (and at most one ping) if someone new is first"""
+    if state.queue.next_in_queue() != first_before:
+        _advance_turn(state, channel_id, now, effects)
+
+
+def remove_many(state, channel_id, user_ids, now):
+    """Remove several users at once; returns the IDs that were actually queued"""
+    if state is None:
+        return [], []
+
+    queue = state.queue
+    first_before = queue.next_in_queue()
+    removed = [user_id for user_id in dict.fromkeys(user_ids) if queue.leave_queue(user_id)]
+    if not removed:
+        return [], []
+
+    effects = [("log", "remove", user_id, None) for user_id in removed]
+    effects.append(RENDER)
+    _settle_first(state, channel_id, now, effects, first_before)
+    return removed, effects
+
+
+def reorder(state, channel_id, user_ids, position, now):
+    """Place the queued users among user_ids, in that order, starting at position"""
+    if state is None:
+        return ("missing", []), []
+
+    queue = state.queue
+    listed = [user_id for user_id in dict.fromkeys(user_ids) if user_id in queue]
+    if not listed:
+        return ("missing", []), []
+    # The block goes in among everyone else, so position can be at most one past them
+    if position < 1 or position > len(queue) - len(listed) + 1:
+        return ("out_of_range", listed), []
+
+    first_before = queue.next_in_queue()
+    effects = []
+    # Take the listed users out to the back first, so placing one never shifts those already placed
+    for user_id in listed:
+        queue.move_user(user_id, len(queue))
+        effects.append(("log", "move", user_id, len(queue)))
+    for offset, user_id in enumerate(listed):
+        queue.move_user(user_id, position + offset)
+        effects.append(("log", "move", user_id, position + offset))
+    effects.append(RENDER)
+    _settle_first(state, channel_id, now, effects, first_before)
+    return ("moved", listed), effects
+
+
+def replace(state, channel_id, user_ids, now):
+    """Replace the whole queue with user_ids (an import); returns the new length.
+
+    Returns None and changes nothing if any ID can't be queued.
+    """
+    order = list(dict.fromkeys(user_ids))
+    if not all(isinstance(user_id, int) and 0 < user_id <= MAX_USER_ID for user_id in order):
+        return None, []
+
+    queue = state.queue
+    first_before = queue.next_in_queue()
+    queue.clear()
+    effects = [("log", "clear", None, None)]
+    for user_id in order:
+        queue.join_queue(user_id)
+        effects.append(("log", "join", user_id, None))
+    effects.append(RENDER)
+    _settle_first(state, channel_id, now, effects, first_before)
+    return len(queue), effects
+
+
+def reset(state, channel_id, now):
+    """Start over for a new panel"""
+    effects = []
+    _cancel_turn(state, effects)
+    state.reset()
+    effects.append(("log", "reset", None, None))
+    return None, effects
+
+
+def panel(state, channel_id, message_id, now):
+    state.message_id = message_id
+    state.channel_id = channel_id
+    effects = [("log", "panel", message_id, channel_id)]
+    # People may have joined while the panel was being posted
+    if state.queue:
+        effects.append(RENDER)
+    return None, effects
+
+
+COMMANDS = {
+    "join": join,
+    "leave": leave,
+    "remove": remove,
+    "next": next_turn,
+    "expire": expire,
+    "move": move,
+    "clear": clear,
+    "start": start,
+    "stop": stop,
+    "remove_many": remove_many,
+    "reorder": reorder,
+    "replace": replace,
+    "reset": reset,
+    "panel": panel,
+}
+
+
+def transition(state, command, now):
+    """Apply one command tuple ``(op, channel_id, *args)`` to a guild's state"""
+    op, *args = command
+    return COMMANDS[op](state, *args, now)
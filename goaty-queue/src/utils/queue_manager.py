@@ -1,35 +1,271 @@
-from collections import deque
-import discord
+# Users per block; a block that grows past this is split in two
+BLOCK_SIZE = 512
+
+# Discord snowflakes are unsigned 64-bit and never 0, so user IDs must be in [1, MAX_USER_ID]
+MAX_USER_ID = 2**64 - 1
+
+
+class _Block:
+    __slots__ = ("users", "index")
+
+    def __init__(self, users):
+        self.users = users
+        self.index = 0  # position in QueueManager._blocks, kept up to date by _rebuild
+
 
 class QueueManager:
+    """Ordered queue of user IDs with fast membership, removal and position lookups.
+
+    The order is a list of blocks of at most ``BLOCK_SIZE`` users each. A
+    dict maps each user to their block, and a Fenwick tree over block sizes
+    gives the number of users in front of any block in O(log n). A rank is
+    that count plus the user's offset within their block, and the k-th user
+    is found by descending the tree. Inserting or removing anywhere touches
+    one block (a shift of at most ``BLOCK_SIZE`` pointers) and one tree path,
+    so joins, leaves, moves and position lookups are O(log n + BLOCK_SIZE)
+    whatever the queue length. Joins fill blocks halfway; a block that
+    fills up is split and a small one merged into its neighbour. Either
+    renumbers the blocks, which is O(n / BLOCK_SIZE) but happens at most
+    once every ``BLOCK_SIZE // 4`` changes to a block.
+
+    ``version`` goes up on every change to the order, so callers can cache
+    anything derived from the queue until it moves.
+
+    Users can carry a priority tier (0 is served first; None, the default,
+    means no priority). The queue only keeps count of each tier; placing a
+    new user after everyone of the same or a better tier is the caller's
+    job, using ``tier_position`` and ``move_user``.
+    """
+
+    __slots__ = ("version", "_tiers", "_tier_counts", "_blocks", "_tree", "_block_of")
+
     def __init__(self):
-        self.queue = deque()
+        self.version = 0
+        self._tiers = {}
+        self._tier_counts = {}
+        self._blocks = []
+        self._tree = [0]  # Fenwick tree over block sizes (block i is node i + 1)
+        self._block_of = {}
+
+    # --- Block helpers ---
+
+    def _rebuild(self):
+        """Renumber the blocks and rebuild the tree after blocks were added or removed"""
+        blocks = self._blocks
+        tree = [0] * (len(blocks) + 1)
+        size = len(tree)
+        for i, block in enumerate(blocks, 1):
+            block.index = i - 1
+            tree[i] += len(block.users)
+            parent = i + (i & -i)
+            if parent < size:
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _append_block(self):
+        """Add an empty block at the end, extending the tree in O(log n)"""
+        block = _Block([])
+        block.index = len(self._blocks)
+        self._blocks.append(block)
+        # The new node covers the blocks in (node - lowbit(node), node]; only the new one is empty
+        node = block.index + 1
+        self._tree.append(self._before(node - 1) - self._before(node - (node & -node)))
+
+    def _add(self, index, delta):
+        i = index + 1
+        tree = self._tree
+        size = len(tree)
+        while i < size:
+            tree[i] += delta
+            i += i & -i
+
+    def _before(self, index):
+        """Number of users in the blocks in front of block ``index``"""
+        i = index
+        total = 0
+        tree = self._tree
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def _locate(self, k):
+        """(block, offset) of the user at 0-based position k"""
+        tree = self._tree
+        size = len(tree)
+        pos = 0
+        step = 1 << (size.bit_length() - 1)
+        while step:
+            nxt = pos + step
+            if nxt < size and tree[nxt] <= k:
+                pos = nxt
+                k -= tree[nxt]
+            step >>= 1
+        return self._blocks[pos], k
+
+    def _insert(self, k, user_id):
+        """Put a user at 0-based position k (0 <= k <= len)"""
+        blocks = self._blocks
+        if k == len(self._block_of):
+            # Appends start a new block once the last one is half full, leaving room for
+            # inserts, so a block takes BLOCK_SIZE // 2 inserts before it has to be split
+            if not blocks or len(blocks[-1].users) >= BLOCK_SIZE // 2:
+                self._append_block()
+            block = blocks[-1]
+            block.users.append(user_id)
+        else:
+            block, offset = self._locate(k)
+            block.users.insert(offset, user_id)
+        self._block_of[user_id] = block
+        self._add(block.index, 1)
+        if len(block.users) > BLOCK_SIZE:
+            self._split(block)
+
+    def _split(self, block):
+        half = len(block.users) // 2
+        new = _Block(block.users[half:])
+        del block.users[half:]
+        block_of = self._block_of
+        for user_id in new.users:
+            block_of[user_id] = new
+        self._blocks.insert(block.index + 1, new)
+        self._rebuild()
+
+    def _remove(self, user_id):
+        """Take a queued user out of the order (their tier is left alone)"""
+        block = self._block_of.pop(user_id)
+        users = block.users
+        if users[0] == user_id:
+            del users[0]
+        else:
+            users.remove(user_id)
+        self._add(block.index, -1)
+        blocks = self._blocks
+        if not users:
+            del blocks[block.index]
+            self._rebuild()
+        elif len(users) < BLOCK_SIZE // 4 and block.index + 1 < len(blocks):
+            # Fold a small block into the next one if they fit together
+            after = blocks[block.index + 1]
+            if len(users) + len(after.users) <= BLOCK_SIZE:
+                block_of = self._block_of
+                for moved in after.users:
+                    block_of[moved] = block
+                users.extend(after.users)
+                del blocks[after.index]
+                self._rebuild()
+
+    # --- Public API ---
+
+    def __len__(self):
+        return len(self._block_of)
+
+    def __contains__(self, user_id):
+        return user_id in self._block_of
+
+    def __iter__(self):
+        for block in self._blocks:
+            yield from block.users
 
     def join_queue(self, user_id):
-        if user_id not in self.queue:
-            self.queue.append(user_id)
-            return True
-        return False
+        if user_id in self._block_of:
+            return False
+        self._insert(len(self._block_of), user_id)
+        self.version += 1
+        return True
 
     def leave_queue(self, user_id):
-        if user_id in self.queue:
-            self.queue.remove(user_id)
-            return True
-        return False
+        if user_id not in self._block_of:
+            return False
+        if self._tiers:
+            self.set_tier(user_id, None)
+        self._remove(user_id)
+        self.version += 1
+        return True
 
     def get_queue(self):
-        return list(self.queue)
+        return list(self)
+
+    def get_range(self, start, count):
+        """Users at 0-based positions [start, start + count)"""
+        if start < 0 or start >= len(self._block_of) or count <= 0:
+            return []
+        block, offset = self._locate(start)
+        result = block.users[offset:offset + count]
+        for block in self._blocks[block.index + 1:]:
+            if len(result) >= count:
+                break
+            result.extend(block.users[:count - len(result)])
+        return result
+
+    def position(self, user_id):
+        """1-based position of a user, or None if they aren't queued"""
+        block = self._block_of.get(user_id)
+        if block is None:
+            return None
+        return self._before(block.index) + block.users.index(user_id) + 1
+
+    def move_user(self, user_id, position):
+        """Move a queued user to a 1-based position"""
+        if user_id not in self._block_of or not 1 <= position <= len(self._block_of):
+            return False
+        if self.position(user_id) == position:
+            return True
+        # Tiers stay with the user; a move counts as one change
+        self._remove(user_id)
+        self._insert(position - 1, user_id)
+        self.version += 1
+        return True
+
+    def clear(self):
+        self._blocks = []
+        self._tree = [0]
+        self._block_of = {}
+        self._tiers = {}
+        self._tier_counts = {}
+        self.version += 1
 
     def notify_user(self, user_id):
         # This function should be called to notify the user when it's their turn
         return f"<@{user_id}>, it's your turn!"
 
     def next_in_queue(self):
-        if self.queue:
-            return self.queue[0]
+        if self._blocks:
+            return self._blocks[0].users[0]
         return None
 
     def remove_next(self):
-        if self.queue:
-            return self.queue.popleft()
-        return None
\ No newline at end of file
+        if not self._blocks:
+            return None
+        user_id = self._blocks[0].users[0]
+        if self._tiers:
+            self.set_tier(user_id, None)
+        self._remove(user_id)
+        self.version += 1
+        return user_id
+
+    # --- Priority tiers ---
+
+    def set_tier(self, user_id, tier):
+        """Set a queued user's priority tier (None for no priority); doesn't move them"""
+        old = self._tiers.pop(user_id, None)
+        if old is not None:
+            self._tier_counts[old] -= 1
+            if not self._tier_counts[old]:
+                del self._tier_counts[old]
+        if tier is not None and user_id in self._block_of:
+            self._tiers[user_id] = tier
+            self._tier_counts[tier] = self._tier_counts.get(tier, 0) + 1
+
+    def tier_of(self, user_id):
+        return self._tiers.get(user_id)
+
+    def tiers(self):
+        """{user_id: tier} for every queued user with a priority tier"""
+        return dict(self._tiers)
+
+    def tier_position(self, tier):
+        """1-based position just after everyone with the same or a better tier than ``tier``"""
+        if tier is None:
+            return len(self._block_of) + 1
+        return sum(count for other, count in self._tier_counts.items() if other <= tier) + 1
@@ -0,0 +1,47 @@
+class QueuePages:
+    """Rendered /show_queue pages, cached per guild until the queue changes.
+
+    A page is addressed by the 0-based position it starts at (always a
+    multiple of ``page_size``) and is read with ``QueueManager.get_range``,
+    so it costs O(page size) no matter how long the queue is. Entries are
+    tied to the queue object and its ``version``; any mutation, or a reset
+    that replaces the queue, makes the next request render afresh.
+    """
+
+    def __init__(self, page_size=20):
+        self.page_size = page_size
+        self._cache = {}  # guild_id -> (queue, version, {start: text})
+
+    def page_count(self, total):
+        return max(1, -(-total // self.page_size))
+
+    def page_start(self, position):
+        """Start of the page holding a 1-based position"""
+        return max(0, position - 1) // self.page_size * self.page_size
+
+    def get(self, guild_id, queue, start):
+        """Return (text, start, total) for the page at ``start``, clamped to the last page"""
+        total = len(queue)
+        start = min(self.page_start(start + 1), (self.page_count(total) - 1) * self.page_size)
+
+        entry = self._cache.get(guild_id)
+        if entry is None or entry[0] is not queue or entry[1] != queue.version:
+            entry = (queue, queue.version, {})
+            self._cache[guild_id] = entry
+        pages = entry[2]
+
+        text = pages.get(start)
+        if text is None:
+            rows = "".join(
+                f"{idx}. <@{user_id}>\n"
+                for idx, user_id in enumerate(queue.get_range(start, self.page_size), start + 1)
+            )
+            text = (
+                f"**Current Queue ({total} people):**\n{rows}"
+                f"\n*Page {start // self.page_size + 1}/{self.page_count(total)}*"
+            )
+            pages[start] = text
+        return text, start, total
+
+    def forget(self, guild_id):
+        self._cache.pop(guild_id, None)
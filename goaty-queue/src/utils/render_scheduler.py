@@ -0,0 +1,84 @@
+import asyncio
+
+
+class RenderScheduler:
+    """Coalesces panel refreshes so each guild has at most one edit in flight.
+
+    Callers mark a guild dirty and return immediately. A per-guild worker
+    renders the latest state; anything marked dirty while an edit is in
+    flight is folded into a single follow-up edit. ``min_interval`` spaces
+    consecutive edits of the same panel.
+
+    ``claim``/``release`` let a caller send a render some other way (in an
+    interaction response) in place of the next scheduled edit, as long as
+    no render is in flight and the panel isn't due to wait for
+    ``min_interval``.
+    """
+
+    def __init__(self, render, min_interval=0.0):
+        self._render = render  # async callable taking a guild_id
+        self.min_interval = min_interval
+        self._dirty = set()
+        self._workers = {}
+        self._rendering = set()
+        self._last_edit = {}
+
+    def mark_dirty(self, guild_id):
+        self._dirty.add(guild_id)
+        if guild_id not in self._workers:
+            self._workers[guild_id] = asyncio.create_task(self._run(guild_id))
+
+    def cancel(self, guild_id):
+        """Drop any pending refresh for a guild"""
+        self._dirty.discard(guild_id)
+        worker = self._workers.pop(guild_id, None)
+        if worker:
+            worker.cancel()
+
+    def claim(self, guild_id):
+        """Take over the guild's next render; False if one is in flight or edits are being spaced out.
+
+        On success the pending refresh (if any) is dropped, and the caller
+        must call ``release`` once its render has been sent (or failed).
+        """
+        if guild_id in self._rendering:
+            return False
+        last = self._last_edit.get(guild_id)
+        if last is not None and asyncio.get_running_loop().time() < last + self.min_interval:
+            return False
+        self._dirty.discard(guild_id)
+        self._rendering.add(guild_id)
+        return True
+
+    def release(self, guild_id, rendered=True):
+        """End a claim; a render sent counts toward ``min_interval`` like an edit"""
+        self._rendering.discard(guild_id)
+        if rendered:
+            self._last_edit[guild_id] = asyncio.get_running_loop().time()
+        if guild_id in self._dirty and guild_id not in self._workers:
+            self._workers[guild_id] = asyncio.create_task(self._run(guild_id))
+
+    async def _run(self, guild_id):
+        loop = asyncio.get_running_loop()
+        try:
+            while guild_id in self._dirty:
+                last = self._last_edit.get(guild_id)
+                if last is not None:
+                    wait = last + self.min_interval - loop.time()
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                # Claimed meanwhile; release() starts a new worker if it's still dirty
+                if guild_id in self._rendering or guild_id not in self._dirty:
+                    break
+                self._dirty.discard(guild_id)
+                self._rendering.add(guild_id)
+                try:
+                    await self._render(guild_id)
+                except Exception as e:
+                    print(f"Failed to update queue panel for guild {guild_id}: {e}")
+                finally:
+                    self._rendering.discard(guild_id)
+                self._last_edit[guild_id] = loop.time()
+        finally:
+            if self._workers.get(guild_id) is asyncio.current_task():
+                del self._workers[guild_id]
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.guild_state import GuildQueueState
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER NOT NULL,
+    op TEXT NOT NULL,
+    target INTEGER,  -- user ID, or the message ID for panel events
+    arg              -- move position, priority tier, panel channel ID or turn start epoch
+);
+CREATE INDEX IF NOT EXISTS events_guild ON events (guild_id, seq);
+CREATE TABLE IF NOT EXISTS snapshots (
+    guild_id INTEGER PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    state TEXT NOT NULL
+);
+"""
+
+
+def _report_failure(future):
+    if future.exception():
+        print(f"Failed to write queue events: {future.exception()!r}")
+
+
+def state_from_snapshot(saved):
+    """Turn a JSON snapshot (queue as a list of user IDs) back into a GuildQueueState"""
+    state = GuildQueueState(
+        message_id=saved["message_id"],
+        channel_id=saved["channel_id"],
+        is_active=saved["is_active"],
+        timer_start=saved["timer_start"],
+    )
+    for user_id in saved["queue"]:
+        state.queue.join_queue(user_id)
+    # JSON object keys are strings
+    for user_id, tier in saved.get("tiers", {}).items():
+        state.queue.set_tier(int(user_id), tier)
+    return state
+
+
+def apply_event(state, op, target, arg):
+    """Replay one logged mutation onto a restored GuildQueueState"""
+    queue = state.queue
+    if op == "join":
+        queue.join_queue(target)
+    elif op in ("leave", "remove"):
+        queue.leave_queue(target)
+    elif op == "next":
+        queue.remove_next()
+    elif op == "move":
+        queue.move_user(target, arg)
+    elif op == "tier":
+        queue.set_tier(target, arg)
+    elif op == "clear":
+        queue.clear()
+    elif op == "start":
+        state.is_active = True
+    elif op == "stop":
+        state.is_active = False
+    elif op == "timer":
+        state.timer_start = arg
+    elif op == "panel":
+        state.message_id = target
+        state.channel_id = arg
+    elif op == "reset":
+        state.reset()
+
+
+class QueueStore:
+    """Durable queue state: an append-only mutation log plus compacted snapshots.
+
+    ``record`` only buffers the event; the buffer is written in one
+    transaction ``flush_interval`` seconds later, so a burst of clicks shares
+    a single commit. The database runs in WAL mode with synchronous=NORMAL,
+    which skips the fsync on ordinary commits. Once ``snapshot_every`` events
+    have been written, every guild touched since the last compaction gets a
+    fresh snapshot from ``snapshot_source`` and its older events are deleted.
+
+    The connection lives on a single writer thread and every query runs
+    there, in submission order. Shard processes share the file, and waiting
+    out another shard's write lock then blocks that thread instead of the
+    event loop. Snapshots are still taken on the caller's thread, together
+    with the batch of events they cover.
+    """
+
+    def __init__(self, path, flush_interval=0.05, snapshot_every=1000):
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="queue-store")
+        self._writer.submit(self._connect, path).result()
+        self.flush_interval = flush_interval
+        self.snapshot_every = snapshot_every
+        self.snapshot_source = None  # callable(guild_id) -> JSON-able state, or None if gone
+        self._pending = []
+        self._flush_handle = None
+        self._dirty = set()
+        self._since_snapshot = 0
+
+    def _connect(self, path):
+        # Shard processes share the file; wait for another writer instead of failing
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def record(self, guild_id, op, target=None, arg=None):
+        self._pending.append((guild_id, op, target, arg))
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.flush_interval, self.flush)
+
+    def flush(self):
+        """Hand buffered events to the writer, with snapshots if a compaction is due"""
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._pending:
+            self._since_snapshot += len(self._pending)
+            self._submit(self._since_snapshot >= self.snapshot_every and self.snapshot_source)
+
+    def compact(self):
+        """Snapshot every guild touched since the last compaction and drop its older events"""
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._submit(True)
+
+    def _submit(self, compact):
+        pending, self._pending = self._pending, []
+        self._dirty.update(event[0] for event in pending)
+        snapshots = None
+        if compact:
+            # Taken now, so each snapshot covers exactly the events written before it
+            snapshots = [(guild_id, self.snapshot_source(guild_id)) for guild_id in self._dirty]
+            self._dirty.clear()
+            self._since_snapshot = 0
+        self._writer.submit(self._write, pending, snapshots).add_done_callback(_report_failure)
+
+    def _write(self, pending, snapshots):
+        with self.conn:
+            self.conn.executemany("INSERT INTO events (guild_id, op, target, arg) VALUES (?, ?, ?, ?)", pending)
+        if snapshots is None:
+            return
+        (last_seq,) = self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM events").fetchone()
+        with self.conn:
+            for guild_id, state in snapshots:
+                if state is None:
+                    self.conn.execute("DELETE FROM snapshots WHERE guild_id = ?", (guild_id,))
+                else:
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO snapshots (guild_id, seq, state) VALUES (?, ?, ?)",
+                        (guild_id, last_seq, json.dumps(state)),
+                    )
+                self.conn.execute("DELETE FROM events WHERE guild_id = ? AND seq <= ?", (guild_id, last_seq))
+
+    def load(self, owns_guild=None):
+        """Rebuild persisted guilds: {guild_id: GuildQueueState}
+
+        ``owns_guild`` limits the result to the guilds this process is responsible for.
+        Runs on the writer thread after anything already submitted; the caller waits.
+        """
+        return self._writer.submit(self._load, owns_guild).result()
+
+    def _load(self, owns_guild):
+        states = {}
+        skipped = set()
+        for guild_id, state_json in self.conn.execute("SELECT guild_id, state FROM snapshots"):
+            if owns_guild and not owns_guild(guild_id):
+                skipped.add(guild_id)
+                continue
+            states[guild_id] = state_from_snapshot(json.loads(state_json))
+        # Snapshots and the events they cover are replaced in one transaction,
+        # so every remaining event is newer than its guild's snapshot
+        for guild_id, op, target, arg in self.conn.execute("SELECT guild_id, op, target, arg FROM events ORDER BY seq"):
+            if guild_id in skipped:
+                continue
+            if guild_id not in states:
+                if owns_guild and not owns_guild(guild_id):
+                    skipped.add(guild_id)
+                    continue
+                states[guild_id] = GuildQueueState()
+            apply_event(states[guild_id], op, target, arg)
+        return states
+
+    def close(self):
+        """Write out everything buffered, then close the connection (waits for the writer)"""
+        self.flush()
+        self._writer.submit(self.conn.close)
+        self._writer.shutdown(wait=True)
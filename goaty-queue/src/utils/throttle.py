@@ -0,0 +1,73 @@
+def parse_limit(text):
+    """Parse "COUNT/SECONDS", e.g. "5/10" -> (5, 10.0): a burst of 5, refilled at 5 per 10 seconds.
+
+    "0" or an empty string turns the limit off (None).
+    """
+    if not text or text.strip() == "0":
+        return None
+    count, _, seconds = text.partition("/")
+    count, seconds = int(count), float(seconds or 1)
+    if count <= 0 or seconds <= 0:
+        raise ValueError(f"Invalid rate limit {text!r}, expected COUNT/SECONDS")
+    return count, seconds
+
+
+class TokenBuckets:
+    """One token bucket per key: holds up to ``capacity`` tokens, refilled at capacity/per per second.
+
+    Only keys that have spent tokens are stored, as (tokens, time of last
+    update). Once the table grows, entries whose bucket has refilled are
+    dropped, so idle users cost nothing.
+    """
+
+    def __init__(self, capacity, per):
+        self.capacity = capacity
+        self.rate = capacity / per
+        self._levels = {}
+        self._prune_at = 1024
+
+    def level(self, key, now):
+        saved = self._levels.get(key)
+        if saved is None:
+            return self.capacity
+        tokens, updated = saved
+        return min(self.capacity, tokens + (now - updated) * self.rate)
+
+    def spend(self, key, now, tokens):
+        self._levels[key] = (tokens - 1, now)
+        if len(self._levels) > self._prune_at:
+            self._prune(now)
+
+    def _prune(self, now):
+        self._levels = {key: saved for key, saved in self._levels.items() if self.level(key, now) < self.capacity}
+        self._prune_at = max(1024, 2 * len(self._levels))
+
+
+class Throttle:
+    """Per-user and per-guild token buckets in front of a group of handlers.
+
+    ``allow`` spends a token from both the user's and the guild's bucket, or
+    from neither if either is empty. It returns None when the call may go
+    ahead, otherwise "user" or "guild" for the bucket that ran dry. Either
+    limit can be None to turn it off. ``now`` is the event loop's clock.
+    """
+
+    def __init__(self, user_limit, guild_limit):
+        self.users = TokenBuckets(*user_limit) if user_limit else None
+        self.guilds = TokenBuckets(*guild_limit) if guild_limit else None
+
+    def allow(self, guild_id, user_id, now):
+        user_tokens = guild_tokens = None
+        if self.users:
+            user_tokens = self.users.level((guild_id, user_id), now)
+            if user_tokens < 1:
+                return "user"
+        if self.guilds:
+            guild_tokens = self.guilds.level(guild_id, now)
+            if guild_tokens < 1:
+                return "guild"
+        if user_tokens is not None:
+            self.users.spend((guild_id, user_id), now, user_tokens)
+        if guild_tokens is not None:
+            self.guilds.spend(guild_id, now, guild_tokens)
+        return None
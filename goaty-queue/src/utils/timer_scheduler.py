@@ -0,0 +1,101 @@
+import asyncio
+import heapq
+import itertools
+
+# Fired timers running this late (in seconds) get logged
+LAG_WARNING = 1.0
+
+
+class TimerHandle:
+    __slots__ = ("deadline", "callback", "args", "cancelled", "_scheduler")
+
+    def __init__(self, deadline, callback, args, scheduler):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+        self._scheduler = scheduler  # until the timer fires or is cancelled
+
+    def cancel(self):
+        self.cancelled = True
+        if self._scheduler:
+            self._scheduler._live -= 1
+            self._scheduler = None
+
+
+class TimerScheduler:
+    """One heap of deadlines on the loop's monotonic clock, shared by every guild.
+
+    Only the earliest deadline is registered with the event loop, so there is
+    a single wakeup no matter how many timers are pending. Scheduling is
+    O(log n); cancelling just flags the handle and the heap drops it lazily.
+    Coroutine callbacks are started as tasks so a slow one can't hold up the
+    rest. ``last_lag``/``max_lag`` report how late timers actually fired.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._seq = itertools.count()
+        self._wakeup = None  # asyncio.TimerHandle for the earliest deadline
+        self._wakeup_at = None
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.fired = 0
+        self._live = 0
+        self._tasks = set()  # running coroutine callbacks; the loop only keeps weak references
+
+    def __len__(self):
+        """Timers still waiting to fire; cancelled ones left in the heap don't count"""
+        return self._live
+
+    def call_at(self, deadline, callback, *args):
+        handle = TimerHandle(deadline, callback, args, self)
+        self._live += 1
+        heapq.heappush(self._heap, (deadline, next(self._seq), handle))
+        if self._wakeup_at is None or deadline < self._wakeup_at:
+            self._arm()
+        return handle
+
+    def call_later(self, delay, callback, *args):
+        loop = asyncio.get_running_loop()
+        return self.call_at(loop.time() + delay, callback, *args)
+
+    def _arm(self):
+        heap = self._heap
+        while heap and heap[0][2].cancelled:
+            heapq.heappop(heap)
+        if self._wakeup:
+            self._wakeup.cancel()
+            self._wakeup = None
+            self._wakeup_at = None
+        if heap:
+            self._wakeup_at = heap[0][0]
+            self._wakeup = asyncio.get_running_loop().call_at(self._wakeup_at, self._fire)
+
+    def _fire(self):
+        loop = asyncio.get_running_loop()
+        self._wakeup = None
+        self._wakeup_at = None
+        heap = self._heap
+        now = loop.time()
+        while heap and heap[0][0] <= now:
+            _, _, handle = heapq.heappop(heap)
+            if handle.cancelled:
+                continue
+            handle._scheduler = None
+            self._live -= 1
+            lag = now - handle.deadline
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self.fired += 1
+            if lag > LAG_WARNING:
+                print(f"Timer fired {lag:.2f}s late ({len(heap)} pending)")
+            try:
+                result = handle.callback(*handle.args)
+                if asyncio.iscoroutine(result):
+                    task = asyncio.create_task(result)
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+            except Exception as e:
+                print(f"Timer callback {handle.callback.__name__} failed: {e}")
+        self._arm()
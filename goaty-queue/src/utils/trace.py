@@ -0,0 +1,45 @@
+import asyncio
+import json
+import time
+
+
+def read_trace(path):
+    """Yield the events of a trace file as lists: [time, kind, *fields]"""
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+class TraceRecorder:
+    """Append-only trace of interactions and timer events for offline replay.
+
+    Each event is one compact JSON array per line, ``[time, kind, *fields]``,
+    with the wall-clock time rounded to the millisecond. Lines are buffered
+    and written out every ``flush_interval`` seconds, so handlers never wait
+    on the disk.
+    """
+
+    def __init__(self, path, flush_interval=1.0):
+        self.file = open(path, "a")
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._flush_handle = None
+
+    def record(self, kind, *fields):
+        self._pending.append(json.dumps([round(time.time(), 3), kind, *fields], separators=(",", ":")))
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.flush_interval, self.flush)
+
+    def flush(self):
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._pending:
+            self.file.write("\n".join(self._pending) + "\n")
+            self.file.flush()
+            self._pending = []
+
+    def close(self):
+        self.flush()
+        self.file.close()
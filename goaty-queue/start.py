@@ -1,5 +1,87 @@
+import os
+import signal
 import subprocess
 import sys
+import time
 
-# Run the bot from the src directory
-subprocess.run([sys.executable, "src/bot.py"])
\ No newline at end of file
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# SHARD_COUNT=0 (default) runs a single unsharded bot, like before.
+# Otherwise SHARD_COUNT shards are split across SHARD_PROCESSES bot processes.
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", 0))
+SHARD_PROCESSES = int(os.getenv("SHARD_PROCESSES", SHARD_COUNT or 1))
+
+# Discord allows one IDENTIFY per 5 seconds (per max_concurrency bucket), so
+# later processes wait for the shards of earlier ones to connect
+IDENTIFY_INTERVAL = 5
+
+# Wait this long before restarting a process that crashed
+RESTART_DELAY = 5
+
+BASE_PORT = int(os.getenv("PORT", 10000))
+
+
+def shard_ranges(shard_count, processes):
+    """Split shard IDs 0..shard_count-1 into contiguous ranges, one per process"""
+    processes = max(1, min(processes, shard_count))
+    size, extra = divmod(shard_count, processes)
+    ranges = []
+    start = 0
+    for index in range(processes):
+        end = start + size + (1 if index < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+def spawn(index, shard_ids):
+    env = dict(os.environ)
+    env["SHARD_COUNT"] = str(SHARD_COUNT)
+    env["SHARD_IDS"] = ",".join(str(shard_id) for shard_id in shard_ids)
+    # Each process serves its own health endpoint
+    env["PORT"] = str(BASE_PORT + index)
+    print(f"Starting process {index} with shards {shard_ids[0]}-{shard_ids[-1]} (health port {env['PORT']})")
+    return subprocess.Popen([sys.executable, "src/bot.py"], env=env)
+
+
+def run_sharded():
+    ranges = shard_ranges(SHARD_COUNT, SHARD_PROCESSES)
+    processes = {}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for process in processes.values():
+            process.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for index, shard_ids in enumerate(ranges):
+        if stopping:
+            break
+        processes[index] = spawn(index, shard_ids)
+        time.sleep(IDENTIFY_INTERVAL * len(shard_ids))
+
+    # Restart any process that exits until we're asked to stop
+    while not stopping:
+        time.sleep(1)
+        for index, process in list(processes.items()):
+            if process.poll() is not None and not stopping:
+                print(f"Process {index} exited with code {process.returncode}, restarting in {RESTART_DELAY}s")
+                time.sleep(RESTART_DELAY)
+                processes[index] = spawn(index, ranges[index])
+
+    for process in processes.values():
+        process.wait()
+
+
+if __name__ == "__main__":
+    if SHARD_COUNT:
+        run_sharded()
+    else:
+        # Run the bot from the src directory
+        subprocess.run([sys.executable, "src/bot.py"])
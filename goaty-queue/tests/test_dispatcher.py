@@ -0,0 +1,74 @@
+import asyncio
+from types import SimpleNamespace
+
+import discord
+
+from utils.dispatcher import ACK, EDIT, PING, OutboundDispatcher
+
+
+def rate_limited():
+    return discord.HTTPException(SimpleNamespace(status=429, reason="Too Many Requests", headers={"Retry-After": "0.01"}), "")
+
+
+def test_slow_channel_does_not_hold_up_others():
+    async def run():
+        outbound = OutboundDispatcher()
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        # discord.py sleeps out an exhausted bucket inside the call
+        slow = [outbound.submit(EDIT, lambda: asyncio.sleep(0.5), lane=channel) for channel in (1, 2)]
+        ping = outbound.submit(PING, lambda: asyncio.sleep(0, "pinged"), lane=3)
+        assert await ping == "pinged"
+        assert loop.time() - started < 0.1
+        await asyncio.gather(*slow)
+        assert len(outbound) == 0 and not outbound._workers
+
+    asyncio.run(run())
+
+
+def test_priority_and_supersede_within_a_lane():
+    async def run():
+        outbound = OutboundDispatcher()
+        order = []
+
+        async def call(name):
+            order.append(name)
+            return name
+
+        first = outbound.submit(EDIT, lambda: call("edit 1"), key="panel", lane=1)
+        second = outbound.submit(EDIT, lambda: call("edit 2"), key="panel", lane=1)
+        ping = outbound.submit(PING, lambda: call("ping"), lane=1)
+        assert await asyncio.gather(first, second, ping) == [None, "edit 2", "ping"]
+        assert order == ["ping", "edit 2"]
+        assert outbound.snapshot()["edit"]["dropped"] == 1
+
+    asyncio.run(run())
+
+
+def test_acks_skip_the_lanes():
+    async def run():
+        outbound = OutboundDispatcher()
+        slow = outbound.submit(EDIT, lambda: asyncio.sleep(0.5), lane=1)
+        ack = outbound.submit(ACK, lambda: asyncio.sleep(0, "acked"))
+        assert await asyncio.wait_for(ack, 0.1) == "acked"
+        assert not outbound._tasks
+        await slow
+
+    asyncio.run(run())
+
+
+def test_rate_limited_job_is_retried():
+    async def run():
+        outbound = OutboundDispatcher()
+        attempts = []
+
+        async def call():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise rate_limited()
+            return "sent"
+
+        assert await outbound.submit(PING, call, lane=1) == "sent"
+        assert outbound.snapshot()["ping"]["retried"] == 1
+
+    asyncio.run(run())
@@ -0,0 +1,14 @@
+import pytest
+
+from utils.queue_io import parse_import
+
+
+def test_parse_import_json_and_csv():
+    assert parse_import("q.json", b'{"queue": [{"user_id": "123"}, "456"]}') == [123, 456]
+    assert parse_import("q.csv", b"position,user_id,name\n1,123,a\n2,456,b\n") == [123, 456]
+
+
+@pytest.mark.parametrize("value", ["0", str(2**64), "12a", ""])
+def test_parse_import_rejects_invalid_ids(value):
+    with pytest.raises(ValueError):
+        parse_import("q.json", f'["5", "{value}"]'.encode())
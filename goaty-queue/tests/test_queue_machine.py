@@ -0,0 +1,95 @@
+from datetime import datetime
+
+from utils import queue_machine
+from utils.guild_state import GuildQueueState
+from utils.queue_manager import QueueManager
+
+NOW = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def make_state(user_ids, active=False):
+    queue = QueueManager()
+    for user_id in user_ids:
+        queue.join_queue(user_id)
+    return GuildQueueState(queue=queue, channel_id=10, is_active=active)
+
+
+def replay_moves(user_ids, effects):
+    """Apply the logged moves to a fresh queue, the way the store restores them"""
+    queue = make_state(user_ids).queue
+    for effect in effects:
+        if effect[:2] == ("log", "move"):
+            queue.move_user(effect[2], effect[3])
+    return queue.get_queue()
+
+
+def test_reorder_places_users_as_one_block():
+    state = make_state([1, 2, 3, 4, 5])
+    (result, listed), effects = queue_machine.reorder(state, None, [1, 2], 3, NOW)
+    assert result == "moved" and listed == [1, 2]
+    assert state.queue.get_queue() == [3, 4, 1, 2, 5]
+    assert replay_moves([1, 2, 3, 4, 5], effects) == [3, 4, 1, 2, 5]
+
+
+def test_reorder_keeps_listed_order():
+    state = make_state([2, 9, 1, 8])
+    queue_machine.reorder(state, None, [1, 2], 2, NOW)
+    assert state.queue.get_queue() == [9, 1, 2, 8]
+
+
+def test_reorder_to_the_back():
+    state = make_state([1, 2, 3, 4, 5])
+    (result, _), _ = queue_machine.reorder(state, None, [2, 1], 4, NOW)
+    assert result == "moved"
+    assert state.queue.get_queue() == [3, 4, 5, 2, 1]
+
+
+def test_reorder_out_of_range_changes_nothing():
+    state = make_state([1, 2, 3, 4, 5])
+    (result, _), effects = queue_machine.reorder(state, None, [1, 2], 5, NOW)
+    assert result == "out_of_range" and effects == []
+    assert state.queue.get_queue() == [1, 2, 3, 4, 5]
+
+
+def test_reorder_new_head_gets_one_turn():
+    state = make_state([1, 2, 3], active=True)
+    state.timer_start = NOW
+    _, effects = queue_machine.reorder(state, None, [3], 1, NOW)
+    assert state.queue.get_queue() == [3, 1, 2]
+    assert [effect for effect in effects if effect[0] == "turn"] == [("turn", 10, 3, False)]
+
+
+def test_replace_with_invalid_id_changes_nothing():
+    state = make_state([1, 2, 3], active=True)
+    state.timer_start = NOW
+    for user_ids in ([4, 2**64], [0, 5]):
+        total, effects = queue_machine.replace(state, None, user_ids, NOW)
+        assert total is None and effects == []
+        assert state.queue.get_queue() == [1, 2, 3]
+        assert state.timer_start is NOW
+
+
+def test_replace_starts_new_head_turn():
+    state = make_state([1, 2, 3], active=True)
+    state.timer_start = NOW
+    total, effects = queue_machine.replace(state, None, [7, 8, 7], NOW)
+    assert total == 2 and state.queue.get_queue() == [7, 8]
+    assert [effect for effect in effects if effect[0] == "turn"] == [("turn", 10, 7, False)]
+
+
+def test_move_head_away_starts_new_head_turn():
+    state = make_state([1, 2, 3], active=True)
+    state.timer_start = NOW
+    later = datetime(2024, 1, 1, 12, 1, 0)
+    _, effects = queue_machine.move(state, None, 1, 3, later)
+    assert state.queue.get_queue() == [2, 3, 1]
+    assert ("turn", 10, 2, False) in effects and ("arm_timer", later) in effects
+    assert state.timer_start is later
+
+
+def test_move_within_queue_keeps_turn():
+    state = make_state([1, 2, 3], active=True)
+    state.timer_start = NOW
+    _, effects = queue_machine.move(state, None, 3, 2, NOW)
+    assert state.queue.get_queue() == [1, 3, 2]
+    assert not [effect for effect in effects if effect[0] in ("turn", "arm_timer", "cancel_timer")]
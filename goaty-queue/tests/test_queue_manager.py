@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from utils import queue_manager
+from utils.queue_manager import QueueManager
+
+
+@pytest.fixture(params=[4, queue_manager.BLOCK_SIZE], ids=["tiny blocks", "default blocks"])
+def block_size(request, monkeypatch):
+    monkeypatch.setattr(queue_manager, "BLOCK_SIZE", request.param)
+    return request.param
+
+
+def check(queue, expected):
+    assert queue.get_queue() == expected
+    assert len(queue) == len(expected)
+    assert queue.next_in_queue() == (expected[0] if expected else None)
+    for i, user_id in enumerate(expected):
+        assert queue.position(user_id) == i + 1
+        assert user_id in queue
+
+
+def test_matches_a_plain_list(block_size):
+    rng = random.Random(block_size)
+    queue = QueueManager()
+    expected = []
+    for step in range(4000):
+        roll = rng.random()
+        user_id = rng.randint(1, 300)
+        if roll < 0.4:
+            assert queue.join_queue(user_id) == (user_id not in expected)
+            if user_id not in expected:
+                expected.append(user_id)
+        elif roll < 0.55:
+            assert queue.leave_queue(user_id) == (user_id in expected)
+            if user_id in expected:
+                expected.remove(user_id)
+        elif roll < 0.65:
+            assert queue.remove_next() == (expected.pop(0) if expected else None)
+        elif roll < 0.95:
+            position = rng.randint(0, len(expected) + 1)
+            moved = queue.move_user(user_id, position)
+            assert moved == (user_id in expected and 1 <= position <= len(expected))
+            if moved:
+                expected.remove(user_id)
+                expected.insert(position - 1, user_id)
+        else:
+            start, count = rng.randint(-1, len(expected)), rng.randint(0, 20)
+            assert queue.get_range(start, count) == (expected[start:start + count] if start >= 0 else [])
+        assert queue.position(user_id) == (expected.index(user_id) + 1 if user_id in expected else None)
+        if step % 100 == 0:
+            check(queue, expected)
+    check(queue, expected)
+    queue.clear()
+    check(queue, [])
+
+
+def test_moves_keep_tiers(block_size):
+    queue = QueueManager()
+    for user_id in range(1, 20):
+        queue.join_queue(user_id)
+    queue.set_tier(7, 0)
+    queue.move_user(7, 1)
+    assert queue.tier_of(7) == 0 and queue.tier_position(0) == 2
+    queue.leave_queue(7)
+    assert queue.tiers() == {} and queue.tier_position(0) == 1
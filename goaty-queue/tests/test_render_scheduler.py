@@ -0,0 +1,66 @@
+import asyncio
+
+from utils.render_scheduler import RenderScheduler
+
+
+def recorder():
+    renders = []
+
+    async def render(guild_id):
+        renders.append(guild_id)
+
+    return renders, render
+
+
+def test_worker_started_during_a_claim_leaves_the_render_to_release():
+    async def run():
+        renders, render = recorder()
+        scheduler = RenderScheduler(render)
+        assert scheduler.claim(1)
+        # A change lands while the interaction response is still being sent
+        scheduler.mark_dirty(1)
+        await asyncio.sleep(0.01)
+        assert renders == [] and not scheduler._workers
+        scheduler.release(1)
+        await asyncio.sleep(0.01)
+        assert renders == [1] and not scheduler._workers
+
+    asyncio.run(run())
+
+
+def test_failed_interaction_edit_hands_the_refresh_back():
+    async def run():
+        renders, render = recorder()
+        scheduler = RenderScheduler(render, min_interval=10)
+        scheduler.mark_dirty(1)
+        # The claim drops the pending refresh before the worker gets to it
+        assert scheduler.claim(1)
+        await asyncio.sleep(0.01)
+        assert renders == []
+        # The edit failed, so nothing counts toward min_interval and the panel is refreshed right away
+        scheduler.release(1, rendered=False)
+        scheduler.mark_dirty(1)
+        await asyncio.sleep(0.01)
+        assert renders == [1]
+
+    asyncio.run(run())
+
+
+def test_claim_refused_within_min_interval():
+    async def run():
+        renders, render = recorder()
+        scheduler = RenderScheduler(render, min_interval=0.05)
+        scheduler.mark_dirty(1)
+        await asyncio.sleep(0.01)
+        assert renders == [1]
+        assert not scheduler.claim(1)
+        scheduler.mark_dirty(1)
+        await asyncio.sleep(0.06)
+        # The spaced-out edit went through the worker, and the next claim waits again
+        assert renders == [1, 1]
+        assert not scheduler.claim(1)
+        await asyncio.sleep(0.06)
+        assert scheduler.claim(1)
+        assert not scheduler.claim(1)
+
+    asyncio.run(run())
@@ -0,0 +1,50 @@
+import asyncio
+import sqlite3
+import time
+
+from utils.storage import QueueStore
+
+
+def test_events_and_snapshots_survive_reopen(tmp_path):
+    path = str(tmp_path / "queues.db")
+    saved = {}
+
+    async def run():
+        store = QueueStore(path, snapshot_every=3)
+        store.snapshot_source = saved.get
+        for user_id in (1, 2, 3):
+            store.record(7, "join", user_id)
+        saved[7] = {"queue": [1, 2, 3], "message_id": 70, "channel_id": 71, "is_active": True, "timer_start": None}
+        store.flush()
+        store.record(7, "next")
+        store.close()
+
+    asyncio.run(run())
+    store = QueueStore(path)
+    states = store.load()
+    store.close()
+    assert states[7].queue.get_queue() == [2, 3]
+    assert states[7].message_id == 70 and states[7].is_active
+
+
+def test_flush_does_not_wait_for_another_writer(tmp_path):
+    path = str(tmp_path / "queues.db")
+    store = QueueStore(path)
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+
+    async def run():
+        store.record(1, "join", 5)
+        started = time.perf_counter()
+        store.flush()
+        return time.perf_counter() - started
+
+    try:
+        assert asyncio.run(run()) < 0.1
+        time.sleep(0.2)
+    finally:
+        other.execute("COMMIT")
+        other.close()
+    states = store.load()
+    store.close()
+    assert states[1].queue.get_queue() == [5]
@@ -0,0 +1,25 @@
+from utils.throttle import Throttle, TokenBuckets
+
+
+def test_both_buckets_checked_before_either_is_charged():
+    throttle = Throttle((2, 10), (1, 10))
+    assert throttle.allow(1, 100, 0.0) is None
+    # The guild ran dry, so the second user's bucket is left untouched
+    assert throttle.allow(1, 200, 0.0) == "guild"
+    assert (1, 200) not in throttle.users._levels
+
+    throttle = Throttle((1, 10), (5, 10))
+    assert throttle.allow(1, 100, 0.0) is None
+    assert throttle.allow(1, 100, 0.0) == "user"
+    assert throttle.guilds.level(1, 0.0) == 4
+
+
+def test_full_buckets_are_pruned():
+    buckets = TokenBuckets(1, 1.0)
+    for key in range(1024):
+        buckets.spend(key, 0.0, buckets.level(key, 0.0))
+    assert len(buckets._levels) == 1024
+    # By now every earlier bucket has refilled; the next spend pushes the table past its limit
+    buckets.spend("new", 10.0, buckets.level("new", 10.0))
+    assert list(buckets._levels) == ["new"]
+    assert buckets.level(0, 10.0) == 1
@@ -0,0 +1,19 @@
+import asyncio
+
+from utils.timer_scheduler import TimerScheduler
+
+
+def test_len_counts_only_live_timers():
+    async def run():
+        timers = TimerScheduler()
+        fired = []
+        first = timers.call_later(0.01, fired.append, 1)
+        timers.call_later(0.02, fired.append, 2)
+        timers.call_later(360, fired.append, 3).cancel()
+        first.cancel()
+        first.cancel()
+        assert len(timers) == 1
+        await asyncio.sleep(0.05)
+        assert fired == [2] and len(timers) == 0 and timers.fired == 1
+
+    asyncio.run(run())